@@ -0,0 +1,56 @@
+"""
+compare resolving an api method per call with the methods bound on the classes
+run: python -m benchmark.api_method
+"""
+import timeit
+
+from telegrambotclient.api import TelegramBotAPI
+from telegrambotclient.base import TelegramObject
+from telegrambotclient.bot import TelegramBot
+
+TOKEN = "123456789:bench"
+NUMBER = 200000
+
+
+class BenchCaller:
+    # answer every request without touching the network
+    def request(self, api_url, data, files):
+        return TelegramObject(id=1, username="bench")
+
+
+def dynamic_api_method(bot_api: TelegramBotAPI, api_name: str):
+    # the way before: TelegramBotAPI.__getattr__ built a closure per call
+    def api_method(token: str, **kwargs):
+        api_data, files = bot_api.__prepare_request_params__(**kwargs)
+        return bot_api.call_api(token, api_name, data=api_data, files=files)
+
+    return api_method
+
+
+def dynamic_bot_method(bot: TelegramBot, api_name: str):
+    # the way before: TelegramBot.__getattr__ built another closure per call
+    def api_method(**kwargs):
+        return dynamic_api_method(bot.bot_api, api_name)(bot.token, **kwargs)
+
+    return api_method
+
+
+def main():
+    bot_api = TelegramBotAPI()
+    bot_api.api_caller = BenchCaller()
+    bot = TelegramBot(TOKEN, bot_api, None, None)
+    bot_api.send_message(TOKEN, chat_id=1, text="warm up")
+    print("{0} calls of send_message".format(NUMBER))
+    for name, bench_bot in (
+        ("per-call closures", lambda: dynamic_bot_method(bot, "send_message")),
+        ("bound methods", lambda: bot.send_message),
+    ):
+        api_call = timeit.timeit(
+            lambda: bench_bot()(chat_id=1, text="hello"), number=NUMBER)
+        lookup = timeit.timeit(bench_bot, number=NUMBER)
+        print("{0:18} call: {1:.3f}s lookup: {2:.3f}s".format(
+            name, api_call, lookup))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+compare json codecs on the hot paths of an update and an api call
+run: python -m benchmark.codec
+"""
+import timeit
+
+from telegrambotclient import codec
+
+UPDATE = (b'{"update_id":123456789,"message":{"message_id":4321,'
+          b'"from":{"id":987654321,"is_bot":false,"first_name":"Foo",'
+          b'"last_name":"Bar","username":"foobar","language_code":"en"},'
+          b'"chat":{"id":987654321,"first_name":"Foo","last_name":"Bar",'
+          b'"username":"foobar","type":"private"},"date":1650000000,'
+          b'"text":"/start hello world \\u4f60\\u597d","entities":'
+          b'[{"offset":0,"length":6,"type":"bot_command"}]}}')
+API_DATA = {
+    "chat_id": 987654321,
+    "text": "I receive: <strong>hello world</strong>",
+    "parse_mode": "HTML",
+    "reply_markup": {
+        "inline_keyboard": [[{
+            "text": "button {0}".format(idx),
+            "callback_data": "button|[{0}]".format(idx)
+        } for idx in range(3)] for _ in range(3)]
+    }
+}
+NUMBER = 100000
+
+
+def bench(codec_name: str):
+    try:
+        codec.use(codec_name)
+    except ImportError:
+        print("{0:8} not installed".format(codec_name))
+        return
+    # the way before: decode bytes into a str, then parse it
+    str_loads = timeit.timeit(lambda: codec.loads(UPDATE.decode("utf-8")),
+                              number=NUMBER)
+    bytes_loads = timeit.timeit(lambda: codec.loads(UPDATE), number=NUMBER)
+    # the way before: serialize into a str, then encode it
+    str_dumps = timeit.timeit(
+        lambda: codec.dumps(API_DATA).encode("utf-8"), number=NUMBER)
+    bytes_dumps = timeit.timeit(lambda: codec.dumpb(API_DATA), number=NUMBER)
+    print(
+        "{0:8} update: {1:6.2f}us -> {2:6.2f}us   call: {3:6.2f}us -> {4:6.2f}us"
+        .format(codec_name, str_loads / NUMBER * 1e6,
+                bytes_loads / NUMBER * 1e6, str_dumps / NUMBER * 1e6,
+                bytes_dumps / NUMBER * 1e6))
+
+
+if __name__ == "__main__":
+    default_codec = codec.name
+    for codec_name in codec.CODECS:
+        bench(codec_name)
+    codec.use(default_codec)
@@ -0,0 +1,147 @@
+"""
+measure how many updates a router dispatches per second
+run: python -m benchmark.dispatch
+"""
+import asyncio
+import re
+import time
+
+from telegrambotclient.base import MessageField, TelegramObject
+from telegrambotclient.router import TelegramRouter
+from telegrambotclient.utils import regex_match
+
+NUMBER = 50000
+
+
+class BenchBot:
+    # only what a router asks for
+    next_call = True
+    stop_call = False
+    token = "123456:bench"
+    user = TelegramObject(id=123456, username="bench_bot")
+
+    def get_force_reply(self, user_id, expires: int = 0):
+        return {}
+
+
+def make_router(regex_route: bool = False) -> TelegramRouter:
+    # regex_route: text patterns in one regex route instead of regex_match handlers
+    router = TelegramRouter("bench")
+
+    async def on_update(bot, data, *args):
+        return bot.next_call
+
+    for idx in range(20):
+        router.register_command_handler(on_update, "/cmd{0}".format(idx))
+    for field in (MessageField.PHOTO, MessageField.DOCUMENT,
+                  MessageField.VIDEO, MessageField.LOCATION,
+                  MessageField.CONTACT, MessageField.STICKER):
+        router.register_message_handler(on_update, field)
+
+    def on_text(bot, message, *args):
+        return bot.next_call
+
+    patterns = tuple(
+        re.compile(r"^pattern{0} (\w+)$".format(idx)) for idx in range(30))
+    if regex_route:
+        router.register_regex_handler(on_text, *patterns)
+    else:
+        for idx, pattern in enumerate(patterns):
+            # the way of example/regex_match.py
+            callback = regex_match(pattern)(on_text)
+            callback.__name__ = "on_pattern{0}".format(idx)
+            router.register_message_handler(callback, MessageField.TEXT)
+    for idx in range(30):
+        router.register_callback_query_handler(on_update,
+                                               "button{0}".format(idx), None)
+    router.register_inline_query_handler(on_update)
+    return router
+
+
+def make_updates():
+    chat = {"id": 1, "type": "private"}
+    user = {"id": 1, "is_bot": False, "first_name": "foo"}
+    return {
+        "text": {
+            "update_id": 1,
+            "message": {
+                "message_id": 1,
+                "from": user,
+                "chat": chat,
+                "date": 0,
+                "text": "pattern29 hello"
+            }
+        },
+        "command": {
+            "update_id": 2,
+            "message": {
+                "message_id": 2,
+                "from": user,
+                "chat": chat,
+                "date": 0,
+                "text": "/cmd19 arg1 arg2",
+                "entities": [{
+                    "offset": 0,
+                    "length": 6,
+                    "type": "bot_command"
+                }]
+            }
+        },
+        "photo": {
+            "update_id": 3,
+            "message": {
+                "message_id": 3,
+                "from": user,
+                "chat": chat,
+                "date": 0,
+                "photo": [{
+                    "file_id": "x",
+                    "file_unique_id": "x",
+                    "width": 1,
+                    "height": 1
+                }]
+            }
+        },
+        "callback_query": {
+            "update_id": 4,
+            "callback_query": {
+                "id": "1",
+                "from": user,
+                "chat_instance": "1",
+                "data": "button29|[1,2]"
+            }
+        },
+        "inline_query": {
+            "update_id": 5,
+            "inline_query": {
+                "id": "1",
+                "from": user,
+                "query": "foo",
+                "offset": ""
+            }
+        },
+    }
+
+
+async def bench(router: TelegramRouter, name: str):
+    bot = BenchBot()
+    for kind, raw_update in make_updates().items():
+        # text messages go through sync regex handlers in threads
+        number = NUMBER // 10 if kind in ("text", "command") else NUMBER
+        updates = [TelegramObject(**raw_update) for _ in range(number)]
+        start_time = time.perf_counter()
+        for update in updates:
+            await router.dispatch(bot, update)
+        elapsed = time.perf_counter() - start_time
+        print("{0:8} {1:15} {2:10.0f} updates/s".format(
+            name, kind, number / elapsed))
+
+
+def main():
+    asyncio.run(bench(make_router(), "dynamic"))
+    asyncio.run(bench(make_router().freeze(), "frozen"))
+    asyncio.run(bench(make_router(regex_route=True).freeze(), "regex"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""
+a fake telegram bot api server to load test the client on one box
+run: python -m benchmark.fake_server --port 8081 --latency 0.005 --flood-rate 0.01
+use: TelegramBotAPI(host="http://127.0.0.1:8081")
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter, deque
+from urllib.parse import parse_qsl, urlsplit
+
+from telegrambotclient import codec
+
+
+class _BotState:
+    __slots__ = ("bot_id", "next_update_id", "next_message_id", "produced",
+                 "start_time", "updates")
+
+    def __init__(self, bot_id: int):
+        self.bot_id = bot_id
+        self.next_update_id = 1
+        self.next_message_id = 1
+        self.produced = 0
+        self.start_time = time.monotonic()
+        self.updates = deque()
+
+
+class FakeBotAPIServer:
+    __slots__ = ("latency", "jitter", "error_rate", "flood_rate",
+                 "retry_after", "updates_per_second", "max_updates", "chats",
+                 "callback_query_rate", "file_size", "counters", "_bots",
+                 "_file_data", "_server")
+
+    def __init__(self,
+                 latency: float = 0,
+                 jitter: float = 0,
+                 error_rate: float = 0,
+                 flood_rate: float = 0,
+                 retry_after: int = 1,
+                 updates_per_second: float = 1000,
+                 max_updates: int = 0,
+                 chats: int = 100,
+                 callback_query_rate: float = 0.2,
+                 file_size: int = 1 << 20):
+        self.latency = latency
+        self.jitter = jitter
+        # shares of calls answered with 500 and 429
+        self.error_rate = error_rate
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        # updates generated for every bot
+        self.updates_per_second = updates_per_second
+        self.max_updates = max_updates
+        self.chats = chats
+        self.callback_query_rate = callback_query_rate
+        self.file_size = file_size
+        # requests of every method, injected errors and floods
+        self.counters = Counter()
+        self._bots = {}
+        self._file_data = b"\x00" * file_size
+        self._server = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8081):
+        self._server = await asyncio.start_server(self.__serve__, host, port)
+        return self._server
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = 8081):
+        await self.start(host, port)
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+
+    def __bot__(self, token: str) -> _BotState:
+        state = self._bots.get(token, None)
+        if state is None:
+            state = self._bots[token] = _BotState(
+                int(token.split(":", 1)[0]) if token[:1].isdigit() else 1)
+        return state
+
+    async def __serve__(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(
+                    " ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if headers.get("transfer-encoding", "") == "chunked":
+                    chunks = []
+                    while True:
+                        size = int((await reader.readline()).strip(), 16)
+                        chunks.append(await reader.readexactly(size + 2))
+                        if size == 0:
+                            break
+                    body = b"".join(chunk[:-2] for chunk in chunks)
+                else:
+                    body = await reader.readexactly(
+                        int(headers.get("content-length", 0)))
+                status, content_type, payload = await self.__handle__(
+                    method, target, headers, body)
+                writer.write(
+                    ("HTTP/1.1 {0} {1}\r\ncontent-type: {2}\r\n"
+                     "content-length: {3}\r\nconnection: keep-alive\r\n\r\n"
+                     ).format(status, "OK" if status == 200 else "ERROR",
+                              content_type, len(payload)).encode("latin-1"))
+                writer.write(payload)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @classmethod
+    def __parse_params__(cls, target: str, headers: dict, body: bytes):
+        url = urlsplit(target)
+        params, files = dict(parse_qsl(url.query)), {}
+        content_type = headers.get("content-type", "")
+        if content_type.startswith("application/json") and body:
+            params.update(codec.loads(body))
+        elif content_type.startswith("application/x-www-form-urlencoded"):
+            params.update(parse_qsl(body.decode("utf-8")))
+        elif content_type.startswith("multipart/form-data"):
+            boundary = b"--" + content_type.split("boundary=",
+                                                  1)[1].strip('"').encode()
+            for part in body.split(boundary):
+                head, _, value = part.partition(b"\r\n\r\n")
+                disposition = head.decode("utf-8", "replace")
+                if "name=" not in disposition:
+                    continue
+                name = disposition.split('name="', 1)[1].split('"', 1)[0]
+                value = value[:-2] if value.endswith(b"\r\n") else value
+                if 'filename="' in disposition:
+                    files[name] = len(value)
+                else:
+                    params[name] = value.decode("utf-8")
+        return url.path, params, files
+
+    @classmethod
+    def __respond__(cls, result, status: int = 200):
+        if status == 200:
+            return 200, "application/json", codec.dumpb({
+                "ok": True,
+                "result": result
+            })
+        return status, "application/json", codec.dumpb(result)
+
+    async def __handle__(self, method: str, target: str, headers: dict,
+                         body: bytes):
+        path, params, files = self.__parse_params__(target, headers, body)
+        parts = path.split("/")
+        # /file/bot<token>/<file_path>
+        if len(parts) > 3 and parts[1] == "file" and method == "GET":
+            self.counters["file"] += 1
+            return 200, "application/octet-stream", self._file_data
+        # /bot<token>/<method>
+        if len(parts) != 3 or not parts[1].startswith("bot"):
+            return self.__respond__(
+                {
+                    "ok": False,
+                    "error_code": 404,
+                    "description": "Not Found"
+                }, 404)
+        bot = self.__bot__(parts[1][3:])
+        api_name = parts[2].lower()
+        self.counters[api_name] += 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+        if api_name != "getme":
+            if self.error_rate and random.random() < self.error_rate:
+                self.counters["injected_errors"] += 1
+                return 500, "text/plain", b"Internal Server Error"
+            if self.flood_rate and random.random() < self.flood_rate:
+                self.counters["injected_floods"] += 1
+                return self.__respond__(
+                    {
+                        "ok": False,
+                        "error_code": 429,
+                        "description":
+                        "Too Many Requests: retry after {0}".format(
+                            self.retry_after),
+                        "parameters": {
+                            "retry_after": self.retry_after
+                        }
+                    }, 429)
+        handler = getattr(self, "on_{0}".format(api_name), None)
+        if handler is None:
+            return self.__respond__(True)
+        return self.__respond__(await handler(bot, params, files))
+
+    def __message__(self, bot: _BotState, chat_id, **kwargs):
+        message = {
+            "message_id": bot.next_message_id,
+            "from": {
+                "id": bot.bot_id,
+                "is_bot": True,
+                "first_name": "fake"
+            },
+            "chat": {
+                "id": int(chat_id),
+                "type": "private"
+            },
+            "date": int(time.time())
+        }
+        message.update(kwargs)
+        bot.next_message_id += 1
+        return message
+
+    def __produce__(self, bot: _BotState):
+        # updates which should have been sent by now
+        produced = int(
+            (time.monotonic() - bot.start_time) * self.updates_per_second)
+        if self.max_updates:
+            produced = min(produced, self.max_updates)
+        while bot.produced < produced:
+            chat_id = random.randint(1, self.chats)
+            user = {"id": chat_id, "is_bot": False, "first_name": "user"}
+            if random.random() < self.callback_query_rate:
+                update = {
+                    "callback_query": {
+                        "id": str(bot.next_update_id),
+                        "from": user,
+                        "message": self.__message__(bot, chat_id, text="menu"),
+                        "chat_instance": str(chat_id),
+                        "data": "button|[1]"
+                    }
+                }
+            else:
+                update = {
+                    "message":
+                    self.__message__(bot,
+                                     chat_id,
+                                     text="hello {0}".format(
+                                         bot.next_update_id))
+                }
+                update["message"]["from"] = user
+            update["update_id"] = bot.next_update_id
+            bot.next_update_id += 1
+            bot.produced += 1
+            bot.updates.append(update)
+
+    async def on_getme(self, bot: _BotState, params: dict, files: dict):
+        return {
+            "id": bot.bot_id,
+            "is_bot": True,
+            "first_name": "fake",
+            "username": "fake_{0}_bot".format(bot.bot_id),
+            "can_join_groups": True,
+            "can_read_all_group_messages": False,
+            "supports_inline_queries": False
+        }
+
+    async def on_getupdates(self, bot: _BotState, params: dict, files: dict):
+        offset = int(params.get("offset", 0) or 0)
+        limit = int(params.get("limit", 100) or 100)
+        deadline = time.monotonic() + int(params.get("timeout", 0) or 0)
+        while True:
+            self.__produce__(bot)
+            # updates before offset are confirmed
+            while bot.updates and bot.updates[0]["update_id"] < offset:
+                bot.updates.popleft()
+            if bot.updates or time.monotonic() >= deadline:
+                return [
+                    bot.updates[index]
+                    for index in range(min(limit, len(bot.updates)))
+                ]
+            await asyncio.sleep(
+                min(deadline - time.monotonic(),
+                    1 / self.updates_per_second
+                    if self.updates_per_second else 0.1))
+
+    async def on_sendmessage(self, bot: _BotState, params: dict, files: dict):
+        return self.__message__(bot,
+                                params.get("chat_id", 1),
+                                text=params.get("text", ""))
+
+    async def on_editmessagetext(self, bot: _BotState, params: dict,
+                                 files: dict):
+        if "inline_message_id" in params:
+            return True
+        message = self.__message__(bot,
+                                   params.get("chat_id", 1),
+                                   text=params.get("text", ""),
+                                   edit_date=int(time.time()))
+        message["message_id"] = int(params.get("message_id", 1))
+        return message
+
+    async def on_answercallbackquery(self, bot: _BotState, params: dict,
+                                     files: dict):
+        return True
+
+    async def on_getfile(self, bot: _BotState, params: dict, files: dict):
+        file_id = params.get("file_id", "file")
+        return {
+            "file_id": file_id,
+            "file_unique_id": file_id[:16],
+            "file_size": self.file_size,
+            "file_path": "documents/{0}.bin".format(file_id)
+        }
+
+    async def on_sendmediagroup(self, bot: _BotState, params: dict,
+                                files: dict):
+        media = params.get("media", "[]")
+        media = codec.loads(media) if isinstance(media, str) else media
+        messages = []
+        for index, item in enumerate(media):
+            kind = item.get("type", "photo")
+            file_id = "{0}_{1}_{2}".format(kind, bot.next_message_id, index)
+            file_obj = {
+                "file_id": file_id,
+                "file_unique_id": file_id,
+                "file_size": files.get(item.get("media", "")[9:], 0)
+            }
+            messages.append(
+                self.__message__(bot,
+                                 params.get("chat_id", 1),
+                                 media_group_id=str(bot.next_message_id),
+                                 **{
+                                     kind:
+                                     [file_obj] if kind == "photo" else file_obj
+                                 }))
+        return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="a fake telegram bot api server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--jitter", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--flood-rate", type=float, default=0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--updates-per-second", type=float, default=1000)
+    parser.add_argument("--max-updates", type=int, default=0)
+    parser.add_argument("--chats", type=int, default=100)
+    parser.add_argument("--file-size", type=int, default=1 << 20)
+    args = parser.parse_args()
+    server = FakeBotAPIServer(latency=args.latency,
+                              jitter=args.jitter,
+                              error_rate=args.error_rate,
+                              flood_rate=args.flood_rate,
+                              retry_after=args.retry_after,
+                              updates_per_second=args.updates_per_second,
+                              max_updates=args.max_updates,
+                              chats=args.chats,
+                              file_size=args.file_size)
+    print("serve on http://{0}:{1}".format(args.host, args.port))
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        print(dict(server.counters))
+
+
+if __name__ == "__main__":
+    main()
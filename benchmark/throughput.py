@@ -0,0 +1,111 @@
+"""
+measure throughput and tail latency of the client against the fake bot api server
+run: python -m benchmark.throughput --latency 0.005 --calls 5000
+"""
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmark.fake_server import FakeBotAPIServer
+from telegrambotclient import TelegramBotClient
+from telegrambotclient.api import AsyncTelegramBotAPI, TelegramBotAPI
+
+TOKEN = "123456:fake"
+
+
+def start_server(server: FakeBotAPIServer, port: int):
+    started = threading.Event()
+
+    async def serve():
+        await server.start("127.0.0.1", port)
+        started.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=asyncio.run, args=(serve(), ),
+                     daemon=True).start()
+    started.wait()
+
+
+def report(name: str, latencies: list, elapsed: float):
+    latencies.sort()
+    print("{0:22} {1:8.0f} calls/s  p50 {2:6.2f}ms  p99 {3:6.2f}ms".format(
+        name,
+        len(latencies) / elapsed, latencies[len(latencies) // 2] * 1000,
+        latencies[int(len(latencies) * 0.99)] * 1000))
+
+
+def bench_sync(host: str, calls: int, concurrency: int):
+    bot_api = TelegramBotAPI(host, maxsize=concurrency)
+
+    def call(_):
+        start_time = time.perf_counter()
+        bot_api.send_message(TOKEN, chat_id=1, text="hello")
+        return time.perf_counter() - start_time
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        start_time = time.perf_counter()
+        latencies = list(executor.map(call, range(calls)))
+        report("sync send_message", latencies,
+               time.perf_counter() - start_time)
+
+
+async def bench_async(host: str, calls: int, concurrency: int):
+    bot_api = AsyncTelegramBotAPI(host, maxsize=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def call():
+        async with semaphore:
+            start_time = time.perf_counter()
+            await bot_api.send_message(TOKEN, chat_id=1, text="hello")
+            latencies.append(time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(calls)))
+    report("async send_message", latencies, time.perf_counter() - start_time)
+    bot_api.api_caller.close()
+
+
+async def bench_polling(host: str, seconds: float, concurrency: int):
+    bot_client = TelegramBotClient("benchmark")
+    router = bot_client.router()
+    handled = []
+
+    @router.message_handler()
+    async def on_message(bot, message):
+        handled.append(message.message_id)
+        await bot.aio.send_message(chat_id=message.chat.id, text="pong")
+        return bot.stop_call
+
+    bot_client.create_bot(TOKEN,
+                          bot_api=TelegramBotAPI(host),
+                          async_bot_api=AsyncTelegramBotAPI(host))
+    await bot_client.start(timeout=1, concurrency=concurrency)
+    await asyncio.sleep(seconds)
+    await bot_client.stop()
+    print("{0:22} {1:8.0f} updates/s".format("polling", len(handled) / seconds))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=18081)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--updates-per-second", type=float, default=2000)
+    args = parser.parse_args()
+    server = FakeBotAPIServer(latency=args.latency,
+                              updates_per_second=args.updates_per_second)
+    start_server(server, args.port)
+    host = "http://127.0.0.1:{0}".format(args.port)
+    bench_sync(host, args.calls, args.concurrency)
+    asyncio.run(bench_async(host, args.calls, args.concurrency))
+    asyncio.run(bench_polling(host, args.seconds, args.concurrency))
+    print(dict(server.counters))
+
+
+if __name__ == "__main__":
+    main()
@@ -13,9 +13,10 @@ router = bot_client.router()
 
 @router.message_handler(MessageField.TEXT)
 async def on_echo_text(bot, message):
-    bot.reply_message(message, text="I will reply in 3s.")
+    # bot.aio calls telegram bot APIs without blocking the event loop
+    await bot.aio.reply_message(message, text="I will reply in 3s.")
     await asyncio.sleep(3)
-    bot.reply_message(
+    await bot.aio.reply_message(
         message,
         text="I receive: *{0}*".format(message.text),
         parse_mode=ParseMode.MARKDOWN,
@@ -23,10 +24,7 @@ async def on_echo_text(bot, message):
     return bot.stop_call
 
 
-async def on_update(bot, update):
-    await router.dispatch(bot, update)
-
-
 bot = bot_client.create_bot(token=BOT_TOKEN)
 bot.delete_webhook(drop_pending_updates=True)
-bot.run_polling(on_update, timeout=10)
+# one event loop, at most 32 updates are handled at the same time
+asyncio.run(bot.polling(router, timeout=10, concurrency=32))
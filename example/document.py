@@ -34,6 +34,12 @@ def on_send_document(bot, message):
         bot.send_document(chat_id=message.chat.id,
                           document=document,
                           thumb=thumb_img)
+    # send an opened file, it is streamed chunk by chunk
+    with open(file, "rb") as file_obj:
+        document = InputFile("sample.txt", file_obj)
+        bot.send_document(chat_id=message.chat.id,
+                          document=document,
+                          thumb=thumb_img)
     return bot.stop_call
 
 
@@ -43,6 +49,8 @@ def on_receive_document(bot, message):
     file_url = bot.get_file_url(file_path=file_obj.file_path)
     file_data = bot.get_file_bytes(file_obj)
     print(file_data)
+    # stream a large file into a local path or a writable file object
+    bot.download_file(file_obj, "/tmp/{0}".format(message.document.file_name))
     bot.reply_message(message, text="download url: {0}".format(file_url))
     return bot.stop_call
 
@@ -12,6 +12,10 @@ BOT_TOKEN = "<BOT_TOKEN>"
 
 router = bot_client.router()
 
+# a static menu is serialized once and sent as it is every time
+MENU_MARKUP = ReplyKeyboard([[KeyboardButton(text="help")]
+                             ]).markup(frozen=True, resize_keyboard=True)
+
 
 @router.message_handler(MessageField.TEXT)
 def on_show_keyboard(bot, message):
@@ -42,6 +46,13 @@ def on_show_keyboard(bot, message):
 def on_reply_button_click(bot, message):
     bot.remove_force_reply(message.chat.id)
     if message.text:
+        if message.text == "click":
+            bot.send_message(
+                chat_id=message.chat.id,
+                text="here is the menu",
+                reply_markup=MENU_MARKUP,
+            )
+            return bot.stop_call
         bot.send_message(
             chat_id=message.chat.id,
             text="you click: {0}".format(message.text),
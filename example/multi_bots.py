@@ -0,0 +1,31 @@
+"""
+run: python -m example.multi_bots
+"""
+from telegrambotclient import bot_client
+from telegrambotclient.base import MessageField
+
+BOT_TOKEN_0 = "<BOT_TOKEN_0>"
+BOT_TOKEN_1 = "<BOT_TOKEN_1>"
+
+# bot 0 uses the router named by its token, others use the default router
+router0 = bot_client.router(BOT_TOKEN_0)
+router = bot_client.router()
+
+
+@router0.message_handler(MessageField.TEXT)
+async def on_text(bot, message):
+    await bot.aio.reply_message(message, text="bot 0: {0}".format(message.text))
+    return bot.stop_call
+
+
+@router.message_handler()
+async def on_message(bot, message):
+    await bot.aio.reply_message(message, text="bot {0}".format(bot.user.id))
+    return bot.stop_call
+
+
+for token in (BOT_TOKEN_0, BOT_TOKEN_1):
+    bot_client.create_bot(token=token).delete_webhook(
+        drop_pending_updates=True)
+
+bot_client.run(timeout=10, concurrency=64)
@@ -14,14 +14,23 @@ pattern_waze_url = re.compile(r"^.*(?P<url>https://waze.com/.+)$")
 pattern_google_map_url = re.compile(r"^.*(?P<url>https://maps.app.goo.gl/.+)$")
 
 
-@router.message_handler(MessageField.TEXT)
-@regex_match(pattern_waze_url, pattern_google_map_url)
-def on_message(bot, message, result):
+# all patterns of a router are matched by one combined pattern,
+# a text message goes to the handler of the first matched pattern
+@router.regex_handler(pattern_waze_url, pattern_google_map_url)
+def on_url(bot, message, result):
     url = result.groupdict().get("url")
     bot.reply_message(message, text="I receive a url: {0}".format(url))
     return bot.stop_call
 
 
+# regex_match checks its patterns inside the handler of every text message
+@router.message_handler(MessageField.TEXT)
+@regex_match(re.compile(r"^echo (?P<text>.+)$"))
+def on_echo(bot, message, result):
+    bot.reply_message(message, text=result.group("text"))
+    return bot.stop_call
+
+
 async def on_update(bot, update):
     await router.dispatch(bot, update)
 
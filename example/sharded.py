@@ -0,0 +1,27 @@
+"""
+run: python -m example.sharded
+"""
+from telegrambotclient import bot_client
+from telegrambotclient.base import MessageField
+from telegrambotclient.shard import ShardedDispatcher
+
+BOT_TOKEN = "<BOT_TOKEN>"
+
+router = bot_client.router()
+
+
+@router.message_handler(MessageField.TEXT)
+def on_text(bot, message):
+    # a cpu bound handler runs in one of the worker processes
+    bot.reply_message(message, text=message.text[::-1])
+    return bot.stop_call
+
+
+# every worker process imports this module to get its own bots and routers
+bot = bot_client.create_bot(token=BOT_TOKEN)
+
+if __name__ == "__main__":
+    bot.delete_webhook(drop_pending_updates=True)
+    # updates of a same chat are always handled by a same worker
+    dispatcher = ShardedDispatcher("example.sharded:bot_client", shards=4)
+    bot_client.run(timeout=10, dispatcher=dispatcher)
@@ -1,11 +1,14 @@
 """
-depends on fastapi and uvicorn
-run: uvicorn example.webhook:app
+depends on an asgi server, e.g. uvicorn
+set webhooks once: WEBHOOK_SECRET_TOKEN=<SECRET> python -m example.webhook
+run: WEBHOOK_SECRET_TOKEN=<SECRET> uvicorn example.webhook:app --workers 4
 """
-from fastapi import FastAPI, Request, status
+import os
+
 from telegrambotclient import bot_client
-from telegrambotclient.base import MessageField, TelegramObject
+from telegrambotclient.base import MessageField
 from telegrambotclient.utils import pretty_print
+from telegrambotclient.webhook import AdmissionControl, WebhookApp
 
 BOT_TOKEN_0 = "<BOT_TOKEN_0>"
 BOT_TOKEN_1 = "<BOT_TOKEN_1>"
@@ -14,7 +17,7 @@ BOT_TOKEN_1 = "<BOT_TOKEN_1>"
 # get a tunnel on port 8000 in Austrlia
 # run in terminal: ngrok http 8000 --region=au
 # replace below with the your https url
-WEBHOOK_URL = "https://5f9d0f13b9fb.au.ngrok.io/{0}"
+WEBHOOK_URL = "https://5f9d0f13b9fb.au.ngrok.io"
 
 router0 = bot_client.router(BOT_TOKEN_0)
 router1 = bot_client.router(BOT_TOKEN_1)
@@ -30,20 +33,20 @@ def on_message(bot, message):
 router0.register_message_handler(on_message, MessageField.TEXT)
 router1.register_message_handler(on_message)  # not only text message
 
-app = FastAPI()
-
-
-@app.post("/{bot_token}", status_code=status.HTTP_200_OK)
-async def serve_update(bot_token: str, request: Request):
-    bot = bot_client.bots.get(bot_token, None)
-    if bot:
-        router = bot_client.routers.get(bot_token, None)
-        if router:
-            await router.dispatch(bot, TelegramObject(**await request.json()))
-    return "OK"
-
-
-bot_client.create_bot(token=BOT_TOKEN_0).set_webhook(
-    url=WEBHOOK_URL.format(BOT_TOKEN_0))
-bot_client.create_bot(token=BOT_TOKEN_1).set_webhook(
-    url=WEBHOOK_URL.format(BOT_TOKEN_1))
+bot_client.create_bot(token=BOT_TOKEN_0)
+bot_client.create_bot(token=BOT_TOKEN_1)
+
+# every bot gets a hashed path and the secret token is checked on every update.
+# past 1000 queued updates, polls and chosen inline results are dropped and
+# others are answered with 503 for telegram to deliver them again later
+# all workers and replicas share one secret token
+app = WebhookApp(bot_client,
+                 os.environ["WEBHOOK_SECRET_TOKEN"],
+                 concurrency=64,
+                 admission=AdmissionControl(max_in_flight=256,
+                                            high_water=1000,
+                                            policy=AdmissionControl.REJECT))
+
+if __name__ == "__main__":
+    # once per deployment, not in every worker
+    app.set_webhooks(WEBHOOK_URL)
@@ -15,5 +15,9 @@ setup(
     author_email='songdi19@gmail.com',
     packages=['telegrambotclient'],
     install_requires=['urllib3', 'ujson'],
+    extras_require={
+        'orjson': ['orjson'],
+        'msgspec': ['msgspec'],
+    },
     python_requires=">=3.5",
 )
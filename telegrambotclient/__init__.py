@@ -1,17 +1,34 @@
-from typing import Optional
-from telegrambotclient.api import TelegramBotAPI
-from telegrambotclient.bot import TelegramBot
+import asyncio
+import signal
+import time
+from typing import Callable, Optional
+from telegrambotclient.api import AsyncTelegramBotAPI, TelegramBotAPI
+from telegrambotclient.base import TelegramBotException
+from telegrambotclient.bot import TelegramBot, logger
+from telegrambotclient.poller import UpdatePoller
 from telegrambotclient.router import TelegramRouter
-from telegrambotclient.storage import TelegramStorage
+from telegrambotclient.scheduler import UpdateScheduler, get_chat_key
+from telegrambotclient.shard import ShardedDispatcher
+from telegrambotclient.storage import TelegramStorage, UpdateCheckpoint
 
 
 class TelegramBotClient:
-    __slots__ = ("bots", "routers", "name", "api_callers")
+    __slots__ = ("bots", "routers", "name", "api_callers",
+                 "async_api_callers", "pollers", "scheduler", "checkpoint",
+                 "dispatcher", "_polling_tasks", "_stopped", "_stop_task")
 
     def __init__(self, name: str = "default"):
         self.bots = {}
         self.routers = {}
         self.api_callers = {}
+        self.async_api_callers = {}
+        self.pollers = {}
+        self.scheduler = None
+        self.checkpoint = None
+        self.dispatcher = None
+        self._polling_tasks = ()
+        self._stopped = None
+        self._stop_task = None
         self.name = name
 
     def router(self, name: str = "default") -> TelegramRouter:
@@ -26,20 +43,196 @@ class TelegramBotClient:
                    bot_api: Optional[TelegramBotAPI] = None,
                    storage: Optional[TelegramStorage] = None,
                    i18n_source=None,
-                   session_expires: int = 1800) -> TelegramBot:
-
-        bot_api = self.api_callers.get(
-            bot_api.host if bot_api else "https://api.telegram.org", None)
-        if bot_api is None:
-            bot_api = TelegramBotAPI()
-            self.api_callers[bot_api.host] = bot_api
+                   session_expires: int = 1800,
+                   async_bot_api: Optional[AsyncTelegramBotAPI] = None
+                   ) -> TelegramBot:
+        host = bot_api.host if bot_api else "https://api.telegram.org"
+        # bots on a same api host share one connection pool
+        if host not in self.api_callers:
+            self.api_callers[host] = bot_api or TelegramBotAPI(host)
+        elif bot_api is not None and bot_api is not self.api_callers[host]:
+            raise TelegramBotException(
+                "a bot api is created for {0} already".format(host))
+        if host not in self.async_api_callers:
+            self.async_api_callers[
+                host] = async_bot_api or AsyncTelegramBotAPI.from_bot_api(
+                    self.api_callers[host])
+        elif async_bot_api is not None and (
+                async_bot_api is not self.async_api_callers[host]):
+            raise TelegramBotException(
+                "an async bot api is created for {0} already".format(host))
+        bot_api = self.api_callers[host]
+        async_bot_api = self.async_api_callers[host]
         bot = TelegramBot(token, bot_api, storage, i18n_source,
-                          session_expires)
+                          session_expires, async_bot_api)
         self.bots[token] = bot
         return bot
 
+    def get_bot_router(self, bot: TelegramBot) -> Optional[TelegramRouter]:
+        # a router named by the bot's token, or the default one
+        return self.routers.get(bot.token, None) or self.routers.get(
+            "default", None)
+
+    @property
+    def metrics(self):
+        return {
+            token: poller.metrics
+            for token, poller in self.pollers.items()
+        }
+
+    async def start(self,
+                    limit: int = 100,
+                    timeout: int = 10,
+                    allowed_updates=None,
+                    concurrency: int = 64,
+                    key: Optional[Callable] = get_chat_key,
+                    prefetch: int = 100,
+                    checkpoint: Optional[UpdateCheckpoint] = None,
+                    restart_delay: float = 1,
+                    max_restart_delay: float = 60,
+                    dispatcher: Optional[ShardedDispatcher] = None,
+                    polling: bool = True):
+        # start to long poll all bots on the running event loop, a failed bot is restarted alone.
+        # polling=False only starts workers for bot_client.submit, e.g. for webhooks
+        tokens = []
+        for token, bot in self.bots.items():
+            if dispatcher or self.get_bot_router(bot):
+                tokens.append(token)
+            else:
+                logger.warning("bot %s has no router to dispatch updates",
+                               bot.user.username)
+
+        async def dispatch(bot: TelegramBot, update):
+            router = dispatcher or self.get_bot_router(bot)
+            if router is not None:
+                await router.dispatch(bot, update)
+
+        # all bots share the workers and the connection pools
+        self.scheduler = UpdateScheduler(dispatch,
+                                         key=key,
+                                         workers=concurrency)
+        self.checkpoint = checkpoint
+        self.dispatcher = dispatcher
+        self.pollers = {
+            token: UpdatePoller(self.bots[token],
+                                self.scheduler,
+                                limit=limit,
+                                timeout=timeout,
+                                allowed_updates=allowed_updates,
+                                prefetch=prefetch,
+                                checkpoint=checkpoint)
+            for token in tokens
+        } if polling else {}
+        self._stopped = asyncio.Event()
+        self._stop_task = None
+        self._polling_tasks = tuple(
+            asyncio.create_task(
+                poller.supervise(restart_delay, max_restart_delay))
+            for poller in self.pollers.values())
+        if checkpoint and not polling:
+            # pollers flush their own bots
+            self._polling_tasks += (asyncio.create_task(self.__flush__()), )
+
+    async def __flush__(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.checkpoint.flush_interval)
+            snapshots = self.checkpoint.snapshots()
+            if snapshots:
+                await loop.run_in_executor(None,
+                                           self.checkpoint.save_snapshots,
+                                           snapshots)
+
+    async def submit(self, bot: TelegramBot, update) -> bool:
+        # hand a received update to workers, False for a duplicated one
+        if self.checkpoint is None:
+            await self.scheduler.submit(bot, update)
+            return True
+        bot_id = bot.user.id
+        if not self.checkpoint.receive(bot_id, update.update_id):
+            return False
+        await self.scheduler.submit(
+            bot, update,
+            lambda update: self.checkpoint.done(bot_id, update.update_id))
+        return True
+
+    async def stop(self, drain_timeout: float = 10):
+        if self._stopped is None:
+            return
+        # a second signal during the drain waits for the first stop
+        if self._stop_task is None:
+            self._stop_task = asyncio.ensure_future(
+                self.__stop__(drain_timeout))
+        await asyncio.shield(self._stop_task)
+
+    async def __stop__(self, drain_timeout: float):
+        deadline = time.monotonic() + drain_timeout
+        # 1. stop fetching, updates which are not handed off are not acknowledged
+        tasks, self._polling_tasks = self._polling_tasks, ()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # 2. finish updates in flight before the deadline
+        try:
+            await asyncio.wait_for(self.scheduler.join(),
+                                   max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            logger.warning("drop %s updates in flight after %s seconds",
+                           self.scheduler.pending, drain_timeout)
+        await self.scheduler.close()
+        if self.dispatcher:
+            try:
+                await asyncio.wait_for(self.dispatcher.join(),
+                                       max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                logger.warning("drop updates which are not sent to shards")
+            await self.dispatcher.close(max(deadline - time.monotonic(), 0))
+        # 3. commit handled updates, telegram keeps updates after the committed offset
+        # so updates cut off are delivered again after a restart
+        if self.checkpoint:
+            self.checkpoint.flush()
+        # 4. close connection pools and storages
+        self.close()
+        self._stopped.set()
+
+    def close(self):
+        for bot_api in self.async_api_callers.values():
+            bot_api.api_caller.close()
+        for bot_api in self.api_callers.values():
+            bot_api.api_caller.close()
+        # bots may share a storage
+        storages = {id(bot.storage): bot.storage for bot in self.bots.values()}
+        for storage in storages.values():
+            storage.close()
+
+    async def polling(self, drain_timeout: float = 10, **kwargs):
+        # long poll until SIGINT or SIGTERM, then stop in drain_timeout seconds
+        await self.start(**kwargs)
+        loop = asyncio.get_running_loop()
+        stop_signals = []
+        for stop_signal in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(
+                    stop_signal, lambda: asyncio.ensure_future(
+                        self.stop(drain_timeout)))
+                stop_signals.append(stop_signal)
+            except (NotImplementedError, RuntimeError):
+                # no signal handlers on windows or out of the main thread
+                pass
+        try:
+            await self._stopped.wait()
+        finally:
+            for stop_signal in stop_signals:
+                loop.remove_signal_handler(stop_signal)
+            if not self._stopped.is_set():
+                await self.stop(drain_timeout)
+
+    def run(self, **kwargs):
+        asyncio.run(self.polling(**kwargs))
+
 
 # a default client
 bot_client = TelegramBotClient()
 
-__all__ = ("bot_client", "TelegramBotClient", "TelegramBotAPI", "TelegramBot")
+__all__ = ("bot_client", "TelegramBotClient", "TelegramBotAPI",
+           "AsyncTelegramBotAPI", "TelegramBot")
@@ -1,14 +1,20 @@
-try:
-    import ujson as json
-except ImportError:
-    import json
-
+import asyncio
+import io
+import mimetypes
+import os
+import random
+import ssl
+import threading
+import time
+from collections import deque
 from io import BytesIO
-from typing import Optional, Union
+from typing import IO, Optional, Union
 import urllib3
 
+from telegrambotclient import codec
 from telegrambotclient.base import (BotCommandScope, InputFile, InputMedia,
                                     TelegramBotException, TelegramObject)
+from telegrambotclient.storage import FileIdCache
 
 
 def exclude_none(**kwargs):
@@ -26,21 +32,329 @@ class TelegramBotAPIException(TelegramBotException):
             **kwargs["parameters"]) if "parameters" in kwargs else {}
 
 
+def parse_response(status: int, data: bytes):
+    if status >= 500:
+        raise TelegramBotAPIException(ok=False,
+                                      error_code=status,
+                                      description=data.decode(
+                                          "utf-8", "replace"))
+    # parse bytes without decoding them into a str first
+    json_response = codec.loads(data)
+    if status == 200 and json_response["ok"]:
+        result = json_response.get("result", None)
+        if result and isinstance(result, dict):
+            return TelegramObject(**result)
+        return result
+    raise TelegramBotAPIException(**json_response)
+
+
+class _MultipartBody:
+    __slots__ = ("parts", "chunk_size", "content_type", "content_length",
+                 "_chunks", "_buffer", "_position")
+
+    def __init__(self, data: dict, files: list, chunk_size: int = 65536):
+        boundary = os.urandom(16).hex()
+        self.parts = []
+        for name, value in data.items():
+            self.parts.append(
+                "--{0}\r\nContent-Disposition: form-data; name=\"{1}\"\r\n\r\n{2}\r\n"
+                .format(boundary, name, value).encode("utf-8"))
+        for name, input_file in files:
+            self.parts.append(
+                ("--{0}\r\nContent-Disposition: form-data; name=\"{1}\"; "
+                 "filename=\"{2}\"\r\nContent-Type: {3}\r\n\r\n").format(
+                     boundary, name,
+                     input_file.file_name.replace('"', "%22"),
+                     input_file.mime_type
+                     or mimetypes.guess_type(input_file.file_name)[0]
+                     or "application/octet-stream").encode("utf-8"))
+            self.parts.append(input_file)
+            self.parts.append(b"\r\n")
+        self.parts.append("--{0}--\r\n".format(boundary).encode("utf-8"))
+        self.chunk_size = chunk_size
+        self.content_type = "multipart/form-data; boundary={0}".format(
+            boundary)
+        self.content_length = sum(
+            len(part) if isinstance(part, bytes) else part.size
+            for part in self.parts)
+        self.seek(0)
+
+    def iter_chunks(self):
+        for part in self.parts:
+            if isinstance(part, bytes):
+                yield part
+            else:
+                yield from part.iter_chunks(self.chunk_size)
+
+    def __len__(self) -> int:
+        return self.content_length
+
+    # a readable and rewindable file-like body for urllib3
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            data = self._buffer + b"".join(self._chunks)
+            self._buffer = b""
+        else:
+            if not self._buffer:
+                self._buffer = next(self._chunks, b"")
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        self._position += len(data)
+        return data
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if offset != 0 or whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("can only rewind a multipart body")
+        self._chunks = self.iter_chunks()
+        self._buffer = b""
+        self._position = 0
+        return 0
+
+
+class _RateBucket:
+    __slots__ = ("interval", "tolerance", "tat", "waiting")
+
+    def __init__(self, rate: float, burst: int):
+        self.interval = 1.0 / rate
+        self.tolerance = (max(burst, 1) - 1) * self.interval
+        # theoretical arrival time of the next call, GCRA style
+        self.tat = 0.0
+        self.waiting = 0
+
+
+class RateLimiter:
+    __slots__ = ("global_rate", "global_burst", "chat_rate", "chat_burst",
+                 "group_rate", "group_burst", "_buckets", "_sweep_size",
+                 "_lock")
+
+    def __init__(self,
+                 global_rate: float = 30,
+                 global_burst: int = 1,
+                 chat_rate: float = 1,
+                 chat_burst: int = 1,
+                 group_rate: float = 20 / 60,
+                 group_burst: int = 1):
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self._buckets = {}
+        self._sweep_size = 1024
+        self._lock = threading.Lock()
+
+    @classmethod
+    def is_group(cls, chat_id) -> bool:
+        # groups, supergroups and channels have negative ids or @username
+        return isinstance(chat_id, str) or chat_id < 0
+
+    def __bucket__(self, key, rate: float, burst: int) -> _RateBucket:
+        bucket = self._buckets.get(key, None)
+        if bucket is None:
+            bucket = self._buckets[key] = _RateBucket(rate, burst)
+        return bucket
+
+    def __sweep__(self, now: float):
+        for key in tuple(self._buckets.keys()):
+            bucket = self._buckets[key]
+            if bucket.tat <= now and bucket.waiting == 0:
+                del self._buckets[key]
+        self._sweep_size = max(1024, 2 * len(self._buckets))
+
+    def __reserve__(self, token: str, chat_id):
+        with self._lock:
+            now = time.monotonic()
+            if len(self._buckets) > self._sweep_size:
+                self.__sweep__(now)
+            if self.is_group(chat_id):
+                chat_bucket = self.__bucket__((token, chat_id),
+                                              self.group_rate,
+                                              self.group_burst)
+            else:
+                chat_bucket = self.__bucket__((token, chat_id),
+                                              self.chat_rate, self.chat_burst)
+            buckets = (self.__bucket__(token, self.global_rate,
+                                       self.global_burst), chat_bucket)
+            # the earliest time which conforms to all buckets
+            call_at = max(now, *(bucket.tat - bucket.tolerance
+                                 for bucket in buckets))
+            for bucket in buckets:
+                bucket.tat = max(bucket.tat, call_at) + bucket.interval
+            delay = call_at - now
+            if delay > 0:
+                for bucket in buckets:
+                    bucket.waiting += 1
+            return delay, buckets
+
+    def __release__(self, buckets):
+        with self._lock:
+            for bucket in buckets:
+                bucket.waiting -= 1
+
+    def wait(self, token: str, chat_id):
+        delay, buckets = self.__reserve__(token, chat_id)
+        if delay > 0:
+            try:
+                time.sleep(delay)
+            finally:
+                self.__release__(buckets)
+
+    async def async_wait(self, token: str, chat_id):
+        delay, buckets = self.__reserve__(token, chat_id)
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                self.__release__(buckets)
+
+    @property
+    def queue_depths(self) -> dict:
+        # {token: calls waiting on the bot, (token, chat_id): calls waiting on the chat}
+        with self._lock:
+            return {
+                key: bucket.waiting
+                for key, bucket in self._buckets.items() if bucket.waiting
+            }
+
+
+class RetryPolicy:
+    # a call of these methods can be repeated safely after a server error
+    IDEMPOTENT_PREFIXES = ("get", "set", "delete", "edit", "answer", "pin",
+                           "unpin", "ban", "unban", "restrict", "promote",
+                           "approve", "decline", "leave", "logout", "close")
+    __slots__ = ("max_retries", "backoff", "max_backoff", "jitter",
+                 "deadline", "budget_ratio", "budget_capacity", "_budget",
+                 "_lock")
+
+    def __init__(self,
+                 max_retries: int = 5,
+                 backoff: float = 0.5,
+                 max_backoff: float = 30,
+                 jitter: float = 1,
+                 deadline: float = 120,
+                 budget_ratio: float = 0.1,
+                 budget_capacity: float = 100):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.deadline = deadline
+        # every successful call earns budget_ratio retries
+        self.budget_ratio = budget_ratio
+        self.budget_capacity = budget_capacity
+        self._budget = budget_capacity
+        self._lock = threading.Lock()
+
+    @classmethod
+    def is_idempotent(cls, api_name: str) -> bool:
+        return api_name.replace("_", "").lower().startswith(
+            cls.IDEMPOTENT_PREFIXES)
+
+    def deposit(self):
+        with self._lock:
+            self._budget = min(self.budget_capacity,
+                               self._budget + self.budget_ratio)
+
+    def __withdraw__(self) -> bool:
+        with self._lock:
+            if self._budget < 1:
+                return False
+            self._budget -= 1
+            return True
+
+    def get_delay(self, api_name: str, attempt: int, error: Exception,
+                  start_time: float) -> Optional[float]:
+        if attempt >= self.max_retries:
+            return None
+        if isinstance(error, TelegramBotAPIException):
+            if error.parameters.get("migrate_to_chat_id", None):
+                delay = 0.0
+            elif error.error_code == 429:
+                delay = error.parameters.get(
+                    "retry_after",
+                    self.backoff) + random.uniform(0, self.jitter)
+            elif error.error_code >= 500 and self.is_idempotent(api_name):
+                delay = self.__backoff__(attempt)
+            else:
+                return None
+        elif self.is_idempotent(api_name):
+            delay = self.__backoff__(attempt)
+        else:
+            return None
+        if time.monotonic() + delay - start_time > self.deadline:
+            return None
+        return delay if self.__withdraw__() else None
+
+    def __backoff__(self, attempt: int) -> float:
+        delay = min(self.max_backoff, self.backoff * 2**attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    @classmethod
+    def migrate(cls, data: dict, error: Exception):
+        if isinstance(error, TelegramBotAPIException) and "chat_id" in data:
+            data["chat_id"] = error.parameters.get("migrate_to_chat_id",
+                                                   data["chat_id"])
+
+
 class TelegramBotAPI:
     API_URL = "/bot{0}/{1}"
     FILE_URL = "/file/bot{0}/{1}"
-    __slots__ = ("api_caller", "host")
+    # Telegram Bot API 6.1, methods which need more than a plain call are defined below
+    API_METHODS = (
+        "get_updates", "set_webhook", "delete_webhook", "get_webhook_info",
+        "get_me", "log_out", "close", "send_message", "forward_message",
+        "copy_message", "send_photo", "send_audio", "send_document",
+        "send_video", "send_animation", "send_voice", "send_video_note",
+        "send_media_group", "send_location", "edit_message_live_location",
+        "stop_message_live_location", "send_venue", "send_contact",
+        "send_poll", "send_dice", "send_chat_action",
+        "get_user_profile_photos", "get_file", "ban_chat_member",
+        "unban_chat_member", "restrict_chat_member", "promote_chat_member",
+        "set_chat_administrator_custom_title", "ban_chat_sender_chat",
+        "unban_chat_sender_chat", "set_chat_permissions",
+        "export_chat_invite_link", "create_chat_invite_link",
+        "edit_chat_invite_link", "revoke_chat_invite_link",
+        "approve_chat_join_request", "decline_chat_join_request",
+        "set_chat_photo", "delete_chat_photo", "set_chat_title",
+        "set_chat_description", "pin_chat_message", "unpin_chat_message",
+        "unpin_all_chat_messages", "leave_chat", "get_chat",
+        "get_chat_administrators", "get_chat_member_count",
+        "get_chat_member", "set_chat_sticker_set", "delete_chat_sticker_set",
+        "answer_callback_query", "set_my_commands", "delete_my_commands",
+        "get_my_commands", "set_chat_menu_button", "get_chat_menu_button",
+        "set_my_default_administrator_rights",
+        "get_my_default_administrator_rights", "edit_message_text",
+        "edit_message_caption", "edit_message_media",
+        "edit_message_reply_markup", "stop_poll", "delete_message",
+        "send_sticker", "get_sticker_set", "upload_sticker_file",
+        "create_new_sticker_set", "add_sticker_to_set",
+        "set_sticker_position_in_set", "delete_sticker_from_set",
+        "set_sticker_set_thumb", "answer_inline_query",
+        "answer_web_app_query", "send_invoice", "create_invoice_link",
+        "answer_shipping_query", "answer_pre_checkout_query",
+        "set_passport_data_errors", "send_game", "set_game_score",
+        "get_game_high_scores")
+    __slots__ = ("api_caller", "host", "rate_limiter", "retry_policy",
+                 "file_id_cache", "_api_urls")
 
     def __init__(self,
                  host: str = "https://api.telegram.org",
                  maxsize: int = 10,
                  block: bool = True,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 chunk_size: int = 65536,
+                 file_id_cache: Optional[FileIdCache] = None,
                  **pool_kwargs):
         class _TelegramBotAPICaller:
-            __slots__ = ("pool", )
+            __slots__ = ("pool", "chunk_size")
 
-            def __init__(_self, maxsize: int, block: bool,
+            def __init__(_self, maxsize: int, block: bool, chunk_size: int,
                          **connection_pool_kwargs):
+                _self.chunk_size = chunk_size
                 connection_pool_kwargs.get("headers", {}).update({
                     "connection":
                     "keep-alive",
@@ -55,65 +369,93 @@ class TelegramBotAPI:
                             (IPPROTO_TCP, TCP_NODELAY, 1),
                             (SOL_SOCKET, SO_KEEPALIVE, 1),
                         ]
-                if self.host.startswith("https://"):
-                    _self.pool = urllib3.HTTPSConnectionPool(
-                        host=self.host[8:],
-                        maxsize=maxsize,
-                        block=block,
-                        **connection_pool_kwargs)
-                elif self.host.startswith("http://"):
-                    _self.pool = urllib3.HTTPConnectionPool(
-                        host=self.host[7:],
-                        maxsize=maxsize,
-                        block=block,
-                        **connection_pool_kwargs)
-                else:
+                if not self.host.startswith(("https://", "http://")):
                     raise TelegramBotException(
                         "Telegram Bot API only supports https:// and http://")
+                # a host may have a port, e.g. http://127.0.0.1:8081
+                _self.pool = urllib3.connection_from_url(
+                    self.host,
+                    maxsize=maxsize,
+                    block=block,
+                    **connection_pool_kwargs)
 
             @classmethod
             def __format_response__(cls, response):
-                if response.status == 500:
-                    raise TelegramBotException(response.data)
-                json_response = json.loads(response.data.decode("utf-8"))
-                if response.status == 200 and json_response["ok"]:
-                    result = json_response.get("result", None)
-                    if result and isinstance(result, dict):
-                        return TelegramObject(**result)
-                    return result
-                raise TelegramBotAPIException(**json_response)
-
-            def request(_self, api_url: str, data: dict, files: list):
+                return parse_response(response.status, response.data)
+
+            def close(_self):
+                _self.pool.close()
 
+            def request(_self,
+                        api_url: str,
+                        data: dict,
+                        files: list,
+                        timeout: Optional[float] = None):
+                # timeout bounds the whole request, the pool's timeout by default
+                request_kwargs = {} if timeout is None else {
+                    "timeout": urllib3.Timeout(total=timeout)
+                }
                 if not files:
                     return _self.__format_response__(
                         _self.pool.request(
                             "POST",
                             api_url,
-                            body=json.dumps(data),
-                            headers={'Content-Type': 'application/json'}))
-                for file in files:
-                    data[file[0]] = file[1]
+                            body=codec.dumpb(data),
+                            headers={'Content-Type': 'application/json'},
+                            **request_kwargs))
+                # stream files from their sources chunk by chunk
+                body = _MultipartBody(data, files, _self.chunk_size)
                 return _self.__format_response__(
-                    _self.pool.request("POST", api_url, fields=data))
+                    _self.pool.request("POST",
+                                       api_url,
+                                       body=body,
+                                       headers={
+                                           "Content-Type": body.content_type,
+                                           "Content-Length": str(len(body))
+                                       },
+                                       **request_kwargs))
 
-            def get_bytes(_self, file_path: str, chunk_size: int) -> bytes:
+            def iter_bytes(_self, file_path: str, chunk_size: int):
                 response = _self.pool.request("GET",
                                               file_path,
                                               preload_content=False)
                 try:
-                    if response.status == 200:
-                        with BytesIO() as buffer:
-                            for chunk in response.stream(chunk_size):
-                                buffer.write(chunk)
-                            return buffer.getvalue()
-                    raise TelegramBotException(response.data)
+                    if response.status != 200:
+                        raise TelegramBotException(response.data)
+                    yield from response.stream(chunk_size)
+                except GeneratorExit:
+                    # the rest of the body is not read, drop the connection
+                    response.close()
+                    raise
                 finally:
                     response.release_conn()
 
+            def get_bytes(_self, file_path: str, chunk_size: int) -> bytes:
+                with BytesIO() as buffer:
+                    for chunk in _self.iter_bytes(file_path, chunk_size):
+                        buffer.write(chunk)
+                    return buffer.getvalue()
+
+            def download(_self, file_path: str, dest: Union[str, IO],
+                         chunk_size: int) -> int:
+                size = 0
+                if isinstance(dest, str):
+                    with open(dest, "wb") as file_obj:
+                        for chunk in _self.iter_bytes(file_path, chunk_size):
+                            size += file_obj.write(chunk)
+                else:
+                    for chunk in _self.iter_bytes(file_path, chunk_size):
+                        size += dest.write(chunk)
+                return size
+
         self.host = host
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.file_id_cache = file_id_cache
+        self._api_urls = {}
         self.api_caller = _TelegramBotAPICaller(maxsize=maxsize,
                                                 block=block,
+                                                chunk_size=chunk_size,
                                                 **pool_kwargs)
 
     @classmethod
@@ -125,29 +467,72 @@ class TelegramBotAPI:
             if isinstance(value, (str, int, bool, float)):
                 continue
             if isinstance(value, (list, tuple)):
-                api_data[field] = json.dumps(value)
+                api_data[field] = codec.dumps(value)
                 continue
             if isinstance(value, TelegramObject):
                 api_data[field] = value.data_
                 continue
             if isinstance(value, InputFile):
                 if field == "thumb":
-                    files.append((value.attach_key, value.file_tuple))
+                    files.append((value.attach_key, value))
                     api_data["thumb"] = value.attach_str
                 else:
-                    files.append((field, value.file_tuple))
+                    files.append((field, value))
                     del api_data[field]
         return api_data, files
 
+    def __api_url__(self, token: str, api_name: str) -> str:
+        # format an api url once for every bot and method
+        key = (token, api_name)
+        api_url = self._api_urls.get(key, None)
+        if api_url is None:
+            api_url = self._api_urls[key] = self.API_URL.format(
+                token,
+                api_name.replace("_", "").lower())
+        return api_url
+
     def call_api(self,
                  token: str,
                  api_name: str,
                  data: dict = {},
                  files: list = []):
-        return self.api_caller.request(
-            self.API_URL.format(token,
-                                api_name.replace("_", "").lower()), data,
-            files)
+        uploads = None
+        if self.file_id_cache and files:
+            files, uploads = self.file_id_cache.substitute(
+                token, api_name, data, files)
+        result = self.__request__(token, api_name, data, files)
+        if uploads:
+            self.file_id_cache.record(token, uploads, result)
+        return result
+
+    def __request__(self, token: str, api_name: str, data: dict,
+                    files: list):
+        api_url = self.__api_url__(token, api_name)
+        attempt, start_time = 0, time.monotonic()
+        while True:
+            if self.rate_limiter and "chat_id" in data:
+                self.rate_limiter.wait(token, data["chat_id"])
+            if self.retry_policy is None:
+                return self.api_caller.request(api_url, data, files)
+            try:
+                # the deadline covers all attempts of a call,
+                # urllib3 takes no timeout of 0
+                result = self.api_caller.request(
+                    api_url, data, files,
+                    max(self.retry_policy.deadline -
+                        (time.monotonic() - start_time), 0.001))
+            except (TelegramBotAPIException,
+                    urllib3.exceptions.HTTPError) as error:
+                delay = self.retry_policy.get_delay(api_name, attempt, error,
+                                                    start_time)
+                if delay is None:
+                    raise error
+                self.retry_policy.migrate(data, error)
+                attempt += 1
+                time.sleep(delay)
+                continue
+            self.retry_policy.deposit()
+            return result
 
     def send_media_group(self, token: str, chat_id, media, **kwargs):
         assert 2 <= len(media) <= 10, True
@@ -156,10 +541,12 @@ class TelegramBotAPI:
         for input_media in media:
             assert isinstance(input_media, InputMedia), True
             media_files.extend(input_media.files)
+            # a frozen input media is serialized once
             media_group.append(input_media.data_)
-        api_data, files = self.__prepare_request_params__(chat_id=chat_id,
-                                                          media=media_group,
-                                                          **kwargs)
+        api_data, files = self.__prepare_request_params__(
+            chat_id=chat_id,
+            media="[{0}]".format(",".join(media_group)),
+            **kwargs)
         return self.call_api(token,
                              "sendMediaGroup",
                              data=api_data,
@@ -190,8 +577,345 @@ class TelegramBotAPI:
         ])
 
     def __getattr__(self, api_name: str):
-        def bot_api_method(token: str, **kwargs):
-            api_data, files = self.__prepare_request_params__(**kwargs)
-            return self.call_api(token, api_name, data=api_data, files=files)
+        # for methods which are not in API_METHODS
+        return make_api_method(api_name).__get__(self)
+
+
+def make_api_method(api_name: str):
+    def bot_api_method(self, token: str, **kwargs):
+        api_data, files = self.__prepare_request_params__(**kwargs)
+        return self.call_api(token, api_name, data=api_data, files=files)
+
+    bot_api_method.__name__ = bot_api_method.__qualname__ = api_name
+    return bot_api_method
+
+
+# bind api methods on the class once instead of resolving them on every call
+for _api_name in TelegramBotAPI.API_METHODS:
+    if not hasattr(TelegramBotAPI, _api_name):
+        setattr(TelegramBotAPI, _api_name, make_api_method(_api_name))
+del _api_name
+
 
-        return bot_api_method
+class _IdleConnectionClosed(ConnectionResetError):
+    pass
+
+
+class _AsyncTelegramBotAPICaller:
+    __slots__ = ("host", "port", "ssl_context", "maxsize", "timeout",
+                 "chunk_size", "headers", "_idle_connections", "_semaphore",
+                 "_loop")
+
+    def __init__(self,
+                 host: str,
+                 maxsize: int,
+                 timeout: Optional[float] = None,
+                 ssl_context: Optional[ssl.SSLContext] = None,
+                 chunk_size: int = 65536):
+        if host.startswith("https://"):
+            host, port = host[8:], 443
+            self.ssl_context = ssl_context or ssl.create_default_context()
+        elif host.startswith("http://"):
+            host, port = host[7:], 80
+            self.ssl_context = None
+        else:
+            raise TelegramBotException(
+                "Telegram Bot API only supports https:// and http://")
+        self.headers = ("Host: {0}\r\n"
+                        "Connection: keep-alive\r\n"
+                        "User-Agent: telegram-bot-client: "
+                        "A Telegram Bot API Python client\r\n").format(host)
+        if ":" in host:
+            host, port = host.rsplit(":", 1)
+        self.host = host
+        self.port = int(port)
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self._idle_connections = deque()
+        self._semaphore = None
+        self._loop = None
+
+    def __bind_loop__(self):
+        # connections can not be shared between event loops
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._idle_connections.clear()
+            self._semaphore = asyncio.Semaphore(self.maxsize)
+            self._loop = loop
+
+    async def __send_request__(self, connection, method: str, url: str,
+                               headers: str, body: Union[bytes,
+                                                         _MultipartBody]):
+        reader, writer = connection
+        try:
+            try:
+                writer.write("{0} {1} HTTP/1.1\r\n{2}{3}"
+                             "Content-Length: {4}\r\n\r\n".format(
+                                 method, url, self.headers, headers,
+                                 len(body)).encode("latin-1"))
+                if isinstance(body, bytes):
+                    writer.write(body)
+                else:
+                    for chunk in body.iter_chunks():
+                        writer.write(chunk)
+                        await writer.drain()
+                await writer.drain()
+                status_line = await reader.readline()
+            except ConnectionError:
+                status_line = b""
+            if not status_line:
+                raise _IdleConnectionClosed("connection to {0} is closed".format(
+                    self.host))
+            keep_alive = status_line.startswith(b"HTTP/1.1")
+            status = int(status_line.split(None, 2)[1])
+            content_length = None
+            chunked = False
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                name = name.strip().lower()
+                if name == "content-length":
+                    content_length = int(value)
+                elif name == "transfer-encoding":
+                    chunked = "chunked" in value.lower()
+                elif name == "connection":
+                    keep_alive = value.strip().lower() != "close"
+        except BaseException:
+            writer.close()
+            raise
+        return status, content_length, chunked, keep_alive
+
+    async def __iter_body__(self, connection, content_length: Optional[int],
+                            chunked: bool, keep_alive: bool,
+                            chunk_size: int):
+        reader, writer = connection
+        try:
+            if chunked:
+                while True:
+                    remaining = int(
+                        (await reader.readline()).split(b";", 1)[0], 16)
+                    if remaining == 0:
+                        while (await reader.readline()) not in (b"\r\n",
+                                                                b"\n", b""):
+                            pass
+                        break
+                    while remaining:
+                        data = await reader.readexactly(
+                            min(remaining, chunk_size))
+                        remaining -= len(data)
+                        yield data
+                    await reader.readline()
+            elif content_length is not None:
+                remaining = content_length
+                while remaining:
+                    data = await reader.readexactly(min(remaining, chunk_size))
+                    remaining -= len(data)
+                    yield data
+            else:
+                keep_alive = False
+                while True:
+                    data = await reader.read(chunk_size)
+                    if not data:
+                        break
+                    yield data
+        except BaseException:
+            # includes a consumer which stops before the end of the body
+            writer.close()
+            raise
+        if keep_alive and len(self._idle_connections) < self.maxsize:
+            self._idle_connections.append(connection)
+        else:
+            writer.close()
+
+    async def __open__(self, method: str, url: str, headers: str,
+                       body: Union[bytes, _MultipartBody]):
+        # the caller must hold the semaphore until the body is read out
+        while self._idle_connections:
+            connection = self._idle_connections.pop()
+            if connection[0].at_eof() or connection[1].is_closing():
+                connection[1].close()
+                continue
+            try:
+                return connection, await self.__send_request__(
+                    connection, method, url, headers, body)
+            except _IdleConnectionClosed:
+                # the server has closed a keep-alive connection, try next
+                continue
+        connection = await asyncio.open_connection(self.host,
+                                                   self.port,
+                                                   ssl=self.ssl_context)
+        return connection, await self.__send_request__(
+            connection, method, url, headers, body)
+
+    async def __send__(self, method: str, url: str, headers: str,
+                       body: Union[bytes, _MultipartBody]):
+        self.__bind_loop__()
+        async with self._semaphore:
+            connection, (status, content_length, chunked,
+                         keep_alive) = await self.__open__(
+                             method, url, headers, body)
+            chunks = [
+                chunk async for chunk in self.__iter_body__(
+                    connection, content_length, chunked, keep_alive,
+                    content_length or self.chunk_size)
+            ]
+            return status, chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+    async def send(self,
+                   method: str,
+                   url: str,
+                   headers: str = "",
+                   body: Union[bytes, _MultipartBody] = b""):
+        if self.timeout:
+            return await asyncio.wait_for(
+                self.__send__(method, url, headers, body), self.timeout)
+        return await self.__send__(method, url, headers, body)
+
+    async def iter_bytes(self, file_path: str, chunk_size: int = 65536):
+        self.__bind_loop__()
+        async with self._semaphore:
+            if self.timeout:
+                connection, head = await asyncio.wait_for(
+                    self.__open__("GET", file_path, "", b""), self.timeout)
+            else:
+                connection, head = await self.__open__(
+                    "GET", file_path, "", b"")
+            body = self.__iter_body__(connection, *head[1:], chunk_size)
+            try:
+                if head[0] != 200:
+                    raise TelegramBotException(b"".join(
+                        [chunk async for chunk in body]))
+                async for chunk in body:
+                    yield chunk
+            finally:
+                await body.aclose()
+
+    async def request(self, api_url: str, data: dict, files: list):
+        if not files:
+            return parse_response(*await self.send(
+                "POST", api_url, "Content-Type: application/json\r\n",
+                codec.dumpb(data)))
+        body = _MultipartBody(data, files, self.chunk_size)
+        return parse_response(*await self.send(
+            "POST", api_url, "Content-Type: {0}\r\n".format(
+                body.content_type), body))
+
+    async def get_bytes(self, file_path: str) -> bytes:
+        status, data = await self.send("GET", file_path)
+        if status == 200:
+            return data
+        raise TelegramBotException(data)
+
+    async def download(self, file_path: str, dest: Union[str, IO],
+                       chunk_size: int) -> int:
+        # open and write the file off the event loop
+        loop = asyncio.get_running_loop()
+        if isinstance(dest, str):
+            file_obj = await loop.run_in_executor(None, open, dest, "wb")
+        else:
+            file_obj = dest
+        size = 0
+        try:
+            async for chunk in self.iter_bytes(file_path, chunk_size):
+                size += await loop.run_in_executor(None, file_obj.write,
+                                                   chunk)
+        finally:
+            if file_obj is not dest:
+                await loop.run_in_executor(None, file_obj.close)
+        return size
+
+    def close(self):
+        while self._idle_connections:
+            self._idle_connections.pop()[1].close()
+
+
+class AsyncTelegramBotAPI(TelegramBotAPI):
+    __slots__ = ()
+
+    def __init__(self,
+                 host: str = "https://api.telegram.org",
+                 maxsize: int = 100,
+                 timeout: Optional[float] = None,
+                 ssl_context: Optional[ssl.SSLContext] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 chunk_size: int = 65536,
+                 file_id_cache: Optional[FileIdCache] = None):
+        self.host = host
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.file_id_cache = file_id_cache
+        self._api_urls = {}
+        self.api_caller = _AsyncTelegramBotAPICaller(host,
+                                                     maxsize=maxsize,
+                                                     timeout=timeout,
+                                                     ssl_context=ssl_context,
+                                                     chunk_size=chunk_size)
+
+    @classmethod
+    def from_bot_api(cls, bot_api: TelegramBotAPI, **kwargs):
+        # share rate limits, the retry budget and cached file ids with a sync api
+        return cls(bot_api.host,
+                   rate_limiter=bot_api.rate_limiter,
+                   retry_policy=bot_api.retry_policy,
+                   chunk_size=bot_api.api_caller.chunk_size,
+                   file_id_cache=bot_api.file_id_cache,
+                   **kwargs)
+
+    async def call_api(self,
+                       token: str,
+                       api_name: str,
+                       data: dict = {},
+                       files: list = []):
+        uploads = None
+        if self.file_id_cache and files:
+            # hashing files and storages block, keep them off the event loop
+            loop = asyncio.get_running_loop()
+            files, uploads = await loop.run_in_executor(
+                None, self.file_id_cache.substitute, token, api_name, data,
+                files)
+        result = await self.__request__(token, api_name, data, files)
+        if uploads:
+            await loop.run_in_executor(None, self.file_id_cache.record, token,
+                                       uploads, result)
+        return result
+
+    async def __request__(self, token: str, api_name: str, data: dict,
+                          files: list):
+        api_url = self.__api_url__(token, api_name)
+        attempt, start_time = 0, time.monotonic()
+        while True:
+            if self.rate_limiter and "chat_id" in data:
+                await self.rate_limiter.async_wait(token, data["chat_id"])
+            if self.retry_policy is None:
+                return await self.api_caller.request(api_url, data, files)
+            try:
+                # the deadline covers all attempts of a call
+                result = await asyncio.wait_for(
+                    self.api_caller.request(api_url, data, files),
+                    max(self.retry_policy.deadline -
+                        (time.monotonic() - start_time), 0))
+            except (TelegramBotAPIException, OSError, asyncio.TimeoutError,
+                    asyncio.IncompleteReadError) as error:
+                delay = self.retry_policy.get_delay(api_name, attempt, error,
+                                                    start_time)
+                if delay is None:
+                    raise error
+                self.retry_policy.migrate(data, error)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self.retry_policy.deposit()
+            return result
+
+    async def get_my_commands(self, token: str,
+                              scope: Optional[BotCommandScope],
+                              language_code: Optional[str]):
+        return tuple([
+            TelegramObject(**raw_command)
+            for raw_command in await self.getMyCommands(
+                token, scope=scope, language_code=language_code)
+        ])
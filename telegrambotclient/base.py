@@ -1,12 +1,11 @@
+import os
 import random
 import string
 from enum import Enum
-from typing import Any, List, Optional, Tuple, Union
+from functools import partial
+from typing import IO, Any, List, Optional, Tuple, Union
 
-try:
-    import ujson as json
-except ImportError:
-    import json
+from telegrambotclient import codec
 
 
 class TelegramBotException(Exception):
@@ -144,24 +143,56 @@ class MIMEType(str, Enum):
 
 
 class InputFile:
-    __slots__ = ("file_name", "_file", "mime_type", "_attach_key")
+    __slots__ = ("file_name", "_file", "mime_type", "_attach_key",
+                 "_position")
 
     def __init__(self,
                  file_name: str,
-                 file: Union[str, bytes],
+                 file: Union[str, bytes, IO],
                  mime_type: Optional[str] = None):
         self.file_name = file_name
-        assert isinstance(file, (str, bytes)), True
+        assert isinstance(file, (str, bytes)) or hasattr(file, "read"), True
+        if hasattr(file, "read") and not (hasattr(file, "seekable")
+                                          and file.seekable()):
+            # the size of a pipe or a socket is unknown until it is read out
+            file = file.read()
         self._file = file
+        self._position = file.tell() if hasattr(file, "tell") else 0
         self.mime_type = mime_type
         self._attach_key = None
 
     @property
-    def file_data(self):
+    def path(self) -> Optional[str]:
+        return self._file if isinstance(self._file, str) else None
+
+    @property
+    def size(self) -> int:
+        if isinstance(self._file, bytes):
+            return len(self._file)
         if isinstance(self._file, str):
+            return os.path.getsize(self._file)
+        current = self._file.tell()
+        try:
+            return self._file.seek(0, os.SEEK_END) - self._position
+        finally:
+            self._file.seek(current)
+
+    def iter_chunks(self, chunk_size: int = 65536):
+        if isinstance(self._file, bytes):
+            for offset in range(0, len(self._file), chunk_size):
+                yield self._file[offset:offset + chunk_size]
+        elif isinstance(self._file, str):
             with open(self._file, "rb") as file_obj:
-                return file_obj.read()
-        return self._file
+                yield from iter(partial(file_obj.read, chunk_size), b"")
+        else:
+            self._file.seek(self._position)
+            yield from iter(partial(self._file.read, chunk_size), b"")
+
+    @property
+    def file_data(self):
+        if isinstance(self._file, bytes):
+            return self._file
+        return b"".join(self.iter_chunks())
 
     @property
     def file_tuple(self):
@@ -201,7 +232,8 @@ class TelegramObject(dict):
 
     def __getitem__(self, name: str) -> Any:
         value = self.__parse__(self.get(name, None))
-        self[name] = value
+        # same content, not a change
+        dict.__setitem__(self, name, value)
         return value
 
     def __getattr__(self, name: str) -> Any:
@@ -215,6 +247,22 @@ class TelegramObject(dict):
         return self
 
 
+UPDATE_FIELDS = frozenset(update_field.value for update_field in UpdateField)
+
+
+def get_update_field(update: TelegramObject) -> Optional[str]:
+    # found once and kept with the update for schedulers, webhooks and routers
+    update_dict = update.__dict__
+    update_field = update_dict.get("_update_field", None)
+    if update_field is None:
+        for name in update:
+            # at most one of the optional fields is present in an update
+            if name in UPDATE_FIELDS and update.get(name, None):
+                update_field = update_dict["_update_field"] = name
+                break
+    return update_field
+
+
 Message = CallbackQuery = ChosenInlineResult = InlineQuery = File = User = WebhookInfo = PhotoSize = StickerSet = Location = ShippingAddress = OrderInfo = EncryptedPassportElement = EncryptedCredentials = PassportFile = CallbackGame = GameHighScore = VCard = ShippingQuery = PreCheckoutQuery = Poll = PollAnswer = ChatMemberUpdated = ChatJoinRequst = WebAppInfo = TelegramObject
 
 MessageEntity = TelegramObject
@@ -301,9 +349,53 @@ class SpoilerEntity(MessageEntity):
 
 
 class JSONSerializedTelegramObject(TelegramObject):
+    def freeze(self):
+        # serialize once and reuse it until the object is changed,
+        # changes inside its values are not detected, call freeze() again
+        self.__dict__["_frozen"] = True
+        self.__dict__["_serialized"] = codec.dumps(self)
+        return self
+
+    @property
+    def frozen(self) -> bool:
+        return self.__dict__.get("_frozen", False)
+
     @property
     def data_(self):
-        return json.dumps(self)
+        if not self.__dict__.get("_frozen", False):
+            return codec.dumps(self)
+        serialized = self.__dict__.get("_serialized", None)
+        if serialized is None:
+            serialized = self.__dict__["_serialized"] = codec.dumps(self)
+        return serialized
+
+    def __setitem__(self, name: str, value):
+        self.__dict__["_serialized"] = None
+        super().__setitem__(name, value)
+
+    def __delitem__(self, name: str):
+        self.__dict__["_serialized"] = None
+        super().__delitem__(name)
+
+    def update(self, *args, **kwargs):
+        self.__dict__["_serialized"] = None
+        super().update(*args, **kwargs)
+
+    def setdefault(self, name: str, default=None):
+        self.__dict__["_serialized"] = None
+        return super().setdefault(name, default)
+
+    def pop(self, name: str, *default):
+        self.__dict__["_serialized"] = None
+        return super().pop(name, *default)
+
+    def popitem(self):
+        self.__dict__["_serialized"] = None
+        return super().popitem()
+
+    def clear(self):
+        self.__dict__["_serialized"] = None
+        super().clear()
 
 
 BotCommandScope = JSONSerializedTelegramObject
@@ -347,14 +439,16 @@ class BotCommandScopeChatMember(BotCommandScope):
 class InputMedia(JSONSerializedTelegramObject):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.files = []
+        # not a field of the media, keep it out of the serialized data
+        files = []
+        object.__setattr__(self, "files", files)
         media = self.get("media", None)
         if media and isinstance(media, InputFile):
-            self.files.append((media.attach_key, media.file_tuple))
+            files.append((media.attach_key, media))
             self["media"] = media.attach_str
         thumb = self.get("thumb", None)
         if thumb and isinstance(thumb, InputFile):
-            self.files.append((thumb.attach_key, thumb.file_tuple))
+            files.append((thumb.attach_key, thumb))
             self["thumb"] = thumb.attach_str
 
 
@@ -462,7 +556,7 @@ class MaskPosition(TelegramObject):
 
     @property
     def data_(self):
-        return json.dumps(self)
+        return codec.dumps(self)
 
 
 class Sticker(TelegramObject):
@@ -1,12 +1,18 @@
 import asyncio
 import logging
+import os
+import shutil
 import sys
 from contextlib import contextmanager
-from typing import Callable, Dict, Optional
+from functools import partial
+from typing import IO, Callable, Dict, Optional, Union
 
-from telegrambotclient.api import TelegramBotAPI
+from telegrambotclient.api import AsyncTelegramBotAPI, TelegramBotAPI
 from telegrambotclient.base import File, Message, TelegramObject
-from telegrambotclient.storage import TelegramSession, TelegramStorage
+from telegrambotclient.poller import UpdatePoller
+from telegrambotclient.scheduler import UpdateScheduler, get_chat_key
+from telegrambotclient.storage import (TelegramSession, TelegramStorage,
+                                       UpdateCheckpoint)
 
 logger = logging.getLogger("telegram-bot-client")
 formatter = logging.Formatter(
@@ -17,23 +23,106 @@ logger.addHandler(console_output_handler)
 logger.setLevel(logging.INFO)
 
 
+def get_local_file_path(file_obj: File) -> Optional[str]:
+    # a local bot api server in --local mode gives an absolute file path
+    if os.path.isabs(file_obj.file_path) and os.path.isfile(
+            file_obj.file_path):
+        return file_obj.file_path
+    return None
+
+
+def copy_local_file(file_path: str, dest: Union[str, IO],
+                    chunk_size: int) -> int:
+    if isinstance(dest, str):
+        # copy_file_range or sendfile on linux
+        shutil.copyfile(file_path, dest)
+    else:
+        with open(file_path, "rb") as file_obj:
+            shutil.copyfileobj(file_obj, dest, chunk_size)
+    return os.path.getsize(file_path)
+
+
+class _AsyncTelegramBotCaller:
+    __slots__ = ("bot", "bot_api")
+
+    def __init__(self, bot, bot_api: AsyncTelegramBotAPI):
+        self.bot = bot
+        self.bot_api = bot_api
+
+    async def reply_message(self, message: Message, **kwargs):
+        kwargs["reply_to_message_id"] = message.message_id
+        return await self.send_message(chat_id=message.chat.id, **kwargs)
+
+    async def get_file_bytes(self, file_obj: File):
+        return await self.bot_api.api_caller.get_bytes(
+            self.bot_api.FILE_URL.format(self.bot.token, file_obj.file_path))
+
+    async def iter_file_bytes(self, file_obj: File, chunk_size: int = 65536):
+        local_path = get_local_file_path(file_obj)
+        if local_path:
+            loop = asyncio.get_running_loop()
+            with open(local_path, "rb") as local_file:
+                while True:
+                    # a chunk at a time off the event loop
+                    chunk = await loop.run_in_executor(None, local_file.read,
+                                                       chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+            return
+        async for chunk in self.bot_api.api_caller.iter_bytes(
+                self.bot_api.FILE_URL.format(self.bot.token,
+                                             file_obj.file_path),
+                chunk_size):
+            yield chunk
+
+    async def download_file(self,
+                            file_obj: File,
+                            dest: Union[str, IO],
+                            chunk_size: int = 65536) -> int:
+        local_path = get_local_file_path(file_obj)
+        if local_path:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, copy_local_file, local_path, dest, chunk_size)
+        return await self.bot_api.api_caller.download(
+            self.bot_api.FILE_URL.format(self.bot.token, file_obj.file_path),
+            dest, chunk_size)
+
+    def __getattr__(self, api_name):
+        # for methods which are not in TelegramBotAPI.API_METHODS
+        return make_async_bot_method(api_name).__get__(self)
+
+
+def make_async_bot_method(api_name: str):
+    def api_method(self, **kwargs):
+        return getattr(self.bot_api, api_name)(self.bot.token, **kwargs)
+
+    api_method.__name__ = api_method.__qualname__ = api_name
+    return api_method
+
+
 class TelegramBot:
     SESSION_ID_FORMAT = "{0}:{1}"
     next_call = True
     stop_call = False
 
     __slots__ = ("token", "bot_api", "storage", "i18n_source",
-                 "session_expires", "user")
+                 "session_expires", "user", "aio")
 
     def __init__(self,
                  token: str,
                  bot_api: Optional[TelegramBotAPI],
                  storage: Optional[TelegramStorage],
                  i18n_source: Optional[Dict],
-                 session_expires: int = 1800):
+                 session_expires: int = 1800,
+                 async_bot_api: Optional[AsyncTelegramBotAPI] = None):
 
         self.token = token
         self.bot_api = bot_api or TelegramBotAPI()
+        # await bot.aio.send_message(...) in async handlers
+        self.aio = _AsyncTelegramBotCaller(
+            self, async_bot_api
+            or AsyncTelegramBotAPI.from_bot_api(self.bot_api))
         if storage is None:
             logger.warning(
                 "You are using a memory session which should be for testing only."
@@ -116,11 +205,31 @@ class TelegramBot:
             self.bot_api.host,
             self.bot_api.FILE_URL.format(self.token, file_path))
 
-    def get_file_bytes(self, file_obj: File):
+    def get_file_bytes(self, file_obj: File, chunk_size: int = 65536):
         return self.bot_api.api_caller.get_bytes(
             self.bot_api.FILE_URL.format(self.token, file_obj.file_path),
-            chunk_size=file_obj.file_size or 1024,
-        )
+            chunk_size=chunk_size)
+
+    def iter_file_bytes(self, file_obj: File, chunk_size: int = 65536):
+        local_path = get_local_file_path(file_obj)
+        if local_path:
+            with open(local_path, "rb") as local_file:
+                yield from iter(partial(local_file.read, chunk_size), b"")
+            return
+        yield from self.bot_api.api_caller.iter_bytes(
+            self.bot_api.FILE_URL.format(self.token, file_obj.file_path),
+            chunk_size)
+
+    def download_file(self,
+                      file_obj: File,
+                      dest: Union[str, IO],
+                      chunk_size: int = 65536) -> int:
+        local_path = get_local_file_path(file_obj)
+        if local_path:
+            return copy_local_file(local_path, dest, chunk_size)
+        return self.bot_api.api_caller.download(
+            self.bot_api.FILE_URL.format(self.token, file_obj.file_path),
+            dest, chunk_size)
 
     def get_deep_link(self,
                       payload: str,
@@ -140,18 +249,71 @@ class TelegramBot:
             logger.warning(
                 "You are using 0 as timeout in long polling which should be used for testing only."
             )
-        while True:
-            for raw_update in self.get_updates(
-                    offset=offset,
-                    limit=limit,
-                    timeout=timeout,
-                    allowed_updates=allowed_updates):
-                update = TelegramObject(**raw_update)
-                offset = update.update_id + 1
-                asyncio.run(on_update_callback(self, update))
+        # one event loop for all updates instead of a new one per update
+        loop = asyncio.new_event_loop()
+        try:
+            while True:
+                for raw_update in self.get_updates(
+                        offset=offset,
+                        limit=limit,
+                        timeout=timeout,
+                        allowed_updates=allowed_updates):
+                    update = TelegramObject(**raw_update)
+                    offset = update.update_id + 1
+                    loop.run_until_complete(on_update_callback(self, update))
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    async def polling(self,
+                      on_update_callback: Callable,
+                      offset: int = 0,
+                      limit: int = 100,
+                      timeout: int = 10,
+                      allowed_updates=None,
+                      concurrency: int = 16,
+                      key: Optional[Callable] = get_chat_key,
+                      prefetch: int = 100,
+                      checkpoint: Optional[UpdateCheckpoint] = None):
+        # on_update_callback is a router or an async callback(bot, update)
+        # updates of a same key(chat by default) keep their order, key=None for no order
+        if timeout == 0:
+            logger.warning(
+                "You are using 0 as timeout in long polling which should be used for testing only."
+            )
+        scheduler = UpdateScheduler(getattr(on_update_callback, "dispatch",
+                                            on_update_callback),
+                                    key=key,
+                                    workers=concurrency)
+        try:
+            await UpdatePoller(self, scheduler, offset, limit, timeout,
+                               allowed_updates, prefetch, checkpoint).run()
+        finally:
+            try:
+                await scheduler.join()
+            finally:
+                await scheduler.close()
+                if checkpoint:
+                    checkpoint.flush(self.user.id)
 
     def __getattr__(self, api_name):
-        def api_method(**kwargs):
-            return getattr(self.bot_api, api_name)(self.token, **kwargs)
+        # for methods which are not in TelegramBotAPI.API_METHODS
+        return make_bot_method(api_name).__get__(self)
+
+
+def make_bot_method(api_name: str):
+    def api_method(self, **kwargs):
+        return getattr(self.bot_api, api_name)(self.token, **kwargs)
+
+    api_method.__name__ = api_method.__qualname__ = api_name
+    return api_method
+
 
-        return api_method
+# bind api methods on the classes once instead of resolving them on every call
+for _api_name in TelegramBotAPI.API_METHODS:
+    if not hasattr(TelegramBot, _api_name):
+        setattr(TelegramBot, _api_name, make_bot_method(_api_name))
+    if not hasattr(_AsyncTelegramBotCaller, _api_name):
+        setattr(_AsyncTelegramBotCaller, _api_name,
+                make_async_bot_method(_api_name))
+del _api_name
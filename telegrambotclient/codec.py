@@ -0,0 +1,81 @@
+import json
+import os
+
+
+def _orjson():
+    import orjson
+    option = orjson.OPT_NON_STR_KEYS
+
+    def orjson_dumps(obj) -> str:
+        return orjson.dumps(obj, option=option).decode("utf-8")
+
+    def orjson_dumpb(obj) -> bytes:
+        return orjson.dumps(obj, option=option)
+
+    return orjson.loads, orjson_dumps, orjson_dumpb
+
+
+def _msgspec():
+    import msgspec
+
+    def enc_hook(obj):
+        if isinstance(obj, dict):
+            return dict(obj)
+        raise TypeError("{0} is not JSON serializable".format(repr(obj)))
+
+    encoder = msgspec.json.Encoder(enc_hook=enc_hook)
+    decoder = msgspec.json.Decoder()
+
+    def msgspec_dumps(obj) -> str:
+        return encoder.encode(obj).decode("utf-8")
+
+    return decoder.decode, msgspec_dumps, encoder.encode
+
+
+def _ujson():
+    import ujson
+
+    def ujson_dumpb(obj) -> bytes:
+        return ujson.dumps(obj).encode("utf-8")
+
+    return ujson.loads, ujson.dumps, ujson_dumpb
+
+
+def _json():
+    encoder = json.JSONEncoder(separators=(",", ":"))
+
+    def json_dumpb(obj) -> bytes:
+        return encoder.encode(obj).encode("utf-8")
+
+    return json.loads, encoder.encode, json_dumpb
+
+
+# the json codec shared by all modules, picked at startup and switchable by use()
+name = "json"
+loads, dumps, dumpb = _json()
+
+CODECS = {
+    "orjson": _orjson,
+    "msgspec": _msgspec,
+    "ujson": _ujson,
+    "json": _json,
+}
+
+
+def use(codec_name: str):
+    global name, loads, dumps, dumpb
+    loads, dumps, dumpb = CODECS[codec_name]()
+    name = codec_name
+
+
+def _use_default():
+    # TELEGRAM_BOT_CLIENT_JSON=orjson|msgspec|ujson|json, or the fastest installed one
+    preferred = os.environ.get("TELEGRAM_BOT_CLIENT_JSON", None)
+    for codec_name in ((preferred, ) if preferred else ()) + tuple(CODECS):
+        try:
+            return use(codec_name)
+        except ImportError:
+            continue
+
+
+_use_default()
@@ -1,4 +1,6 @@
 import asyncio
+import inspect
+import re
 from typing import Callable, Optional, Union
 
 from telegrambotclient.base import UpdateField
@@ -38,12 +40,41 @@ class ErrorHandler(UpdateHandler):
         self.errors = errors or (Exception, )
 
 
+def accepts_args(callback: Callable, count: int) -> bool:
+    # more positional arguments than count
+    try:
+        parameters = inspect.signature(callback).parameters.values()
+    except (TypeError, ValueError):
+        return True
+    positional = 0
+    for parameter in parameters:
+        if parameter.kind == parameter.VAR_POSITIONAL:
+            return True
+        if parameter.kind in (parameter.POSITIONAL_ONLY,
+                              parameter.POSITIONAL_OR_KEYWORD):
+            positional += 1
+    return positional > count
+
+
 class CommandHandler(UpdateHandler):
-    __slots__ = ("cmds", )
+    __slots__ = ("cmds", "with_args")
 
     def __init__(self, callback: Callable, *cmds):
         super().__init__(callback=callback, update_field="command")
         self.cmds = cmds
+        # args are parsed only for callbacks which take them
+        self.with_args = accepts_args(callback, 2)
+
+
+class RegexHandler(UpdateHandler):
+    __slots__ = ("patterns", )
+
+    def __init__(self, callback: Callable, *patterns):
+        super().__init__(callback=callback, update_field="regex")
+        self.patterns = tuple(
+            re.compile(pattern) if isinstance(pattern, str) else pattern
+            for pattern in patterns)
+        assert bool(self.patterns), True
 
 
 class ForceReplyHandler(UpdateHandler):
@@ -83,13 +114,18 @@ class EditedChannelPostHandler(_MessageHandler):
 
 
 class CallbackQueryHandler(UpdateHandler):
-    __slots__ = ("data", )
+    __slots__ = ("data", "with_args")
 
-    def __init__(self, callback: Callable, callback_data: Optional[str],
-                 game_short_name: Optional[str]):
+    def __init__(self,
+                 callback: Callable,
+                 callback_data: Optional[str] = None,
+                 game_short_name: Optional[str] = None):
         super().__init__(callback, UpdateField.CALLBACK_QUERY)
+        # "button", or "menu:settings:*" for all buttons under "menu:settings:"
         self.data = callback_data or game_short_name
         assert bool(self.data), True
+        # args of callback data are decoded only for callbacks which take them
+        self.with_args = accepts_args(callback, 2)
 
 
 class InlineQueryHandler(UpdateHandler):
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from telegrambotclient.base import TelegramObject
+from telegrambotclient.scheduler import UpdateScheduler
+from telegrambotclient.storage import UpdateCheckpoint
+
+logger = logging.getLogger("telegram-bot-client")
+
+
+class UpdatePoller:
+    # long polls a bot and hands its updates to a scheduler.
+    # the next batch is fetched while the current one is handed off, and
+    # at most prefetch(one at least) updates are buffered
+    __slots__ = ("bot", "scheduler", "offset", "limit", "timeout",
+                 "allowed_updates", "prefetch", "updates", "restarts", "lag",
+                 "last_poll_time", "checkpoint", "_buffer",
+                 "_fetched_offset", "_caught_up")
+    # seconds between polls while a whole batch is in flight
+    IN_FLIGHT_POLL_INTERVAL = 0.1
+
+    def __init__(self,
+                 bot,
+                 scheduler: UpdateScheduler,
+                 offset: int = 0,
+                 limit: int = 100,
+                 timeout: int = 10,
+                 allowed_updates=None,
+                 prefetch: int = 100,
+                 checkpoint: Optional[UpdateCheckpoint] = None):
+        # a queue of size 0 is unbounded
+        assert prefetch >= 1, True
+        self.bot = bot
+        self.scheduler = scheduler
+        # updates before offset are handed off, and acknowledged to telegram
+        # without a checkpoint
+        self.offset = offset
+        self.limit = limit
+        self.timeout = timeout
+        self.allowed_updates = allowed_updates
+        self.prefetch = prefetch
+        self.checkpoint = checkpoint
+        self._buffer = None
+        self._fetched_offset = offset
+        self._caught_up = None
+        self.updates = 0
+        self.restarts = 0
+        # seconds between an update is sent and it is handed to the scheduler
+        self.lag = 0.0
+        self.last_poll_time = 0.0
+
+    @property
+    def metrics(self):
+        return {
+            "offset": self.offset,
+            "updates": self.updates,
+            "restarts": self.restarts,
+            "lag": self.lag,
+            "last_poll_time": self.last_poll_time,
+            "prefetched": self._buffer.qsize() if self._buffer else 0,
+            "pending": self.scheduler.get_pending(self.bot.token)
+        }
+
+    async def run(self):
+        if self.checkpoint:
+            # resume from the last committed update
+            self.offset = max(
+                self.offset,
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.checkpoint.load, self.bot.user.id))
+        # updates buffered by a failed run are fetched again from self.offset
+        self._buffer = asyncio.Queue(self.prefetch)
+        self._fetched_offset = self.offset
+        self._caught_up = asyncio.Event()
+        tasks = [
+            asyncio.create_task(self.__fetch__()),
+            asyncio.create_task(self.__hand_off__())
+        ]
+        if self.checkpoint:
+            tasks.append(asyncio.create_task(self.__flush__()))
+        try:
+            done, _ = await asyncio.wait(tasks,
+                                         return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def __fetch__(self):
+        bot_id = self.bot.user.id if self.checkpoint else None
+        while True:
+            # only acknowledge updates which are handed off, or which are done
+            # with a checkpoint, updates in flight are delivered again after a crash
+            ack_offset = min(self.checkpoint.load(bot_id),
+                             self.offset) if self.checkpoint else self.offset
+            raw_updates = await self.bot.aio.get_updates(
+                offset=ack_offset,
+                limit=self.limit,
+                timeout=self.timeout,
+                allowed_updates=self.allowed_updates)
+            self.last_poll_time = time.time()
+            fetched = False
+            for raw_update in raw_updates:
+                # skip updates which are buffered already
+                if raw_update["update_id"] < self._fetched_offset:
+                    continue
+                # wait when the buffer is full
+                await self._buffer.put(TelegramObject(**raw_update))
+                self._fetched_offset = raw_update["update_id"] + 1
+                fetched = True
+            if not fetched and self.offset < self._fetched_offset:
+                # nothing new but buffered updates, poll again after they are handed off
+                self._caught_up.clear()
+                await self._caught_up.wait()
+            elif not fetched and raw_updates:
+                # a batch of updates in flight only, telegram sends it again at once
+                await asyncio.sleep(self.IN_FLIGHT_POLL_INTERVAL)
+
+    async def __hand_off__(self):
+        bot_id = self.bot.user.id if self.checkpoint else None
+        # commit an update to the checkpoint once it is handled
+        done = (lambda update: self.checkpoint.done(bot_id, update.update_id)
+                ) if self.checkpoint else None
+        while True:
+            update = await self._buffer.get()
+            if done is None or self.checkpoint.receive(bot_id,
+                                                       update.update_id):
+                await self.scheduler.submit(self.bot, update, done)
+            self.offset = update.update_id + 1
+            self.updates += 1
+            self.lag = self.__get_lag__(update)
+            if self.offset >= self._fetched_offset:
+                self._caught_up.set()
+
+    async def __flush__(self):
+        # commit done updates to the storage in batches
+        loop = asyncio.get_running_loop()
+        bot_id = self.bot.user.id
+        while True:
+            await asyncio.sleep(self.checkpoint.flush_interval)
+            mapping = self.checkpoint.snapshot(bot_id)
+            if mapping:
+                await loop.run_in_executor(None, self.checkpoint.save, bot_id,
+                                           mapping)
+
+    @classmethod
+    def __get_lag__(cls, update: TelegramObject) -> float:
+        for name, value in update.items():
+            if name != "update_id" and isinstance(value, dict):
+                date = value.get("date", None) or value.get(
+                    "message", {}).get("date", None)
+                return max(time.time() - date, 0.0) if date else 0.0
+        return 0.0
+
+    async def supervise(self,
+                        restart_delay: float = 1,
+                        max_restart_delay: float = 60):
+        # restart the polling loop on failures with an exponential backoff
+        delay = restart_delay
+        while True:
+            last_poll_time = self.last_poll_time
+            try:
+                await self.run()
+            except Exception:
+                if self.last_poll_time != last_poll_time:
+                    # it has worked since the last failure
+                    delay = restart_delay
+                self.restarts += 1
+                logger.exception(
+                    "polling of bot %s fails, restart it in %.1f seconds",
+                    self.bot.user.username, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, max_restart_delay)
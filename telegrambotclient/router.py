@@ -1,21 +1,27 @@
-from collections import UserDict, UserList
-from typing import Callable, Optional
+import logging
+import re
+from collections import UserDict, UserList, defaultdict
+from functools import partial
+from types import MappingProxyType
+from typing import Callable, Optional, Tuple
 
 from telegrambotclient.base import (CallbackQuery, ChatJoinRequst,
                                     ChatMemberUpdated, ChosenInlineResult,
                                     InlineQuery, Message, MessageField, Poll,
                                     PollAnswer, PreCheckoutQuery,
                                     ShippingQuery, TelegramBotException,
-                                    TelegramObject, UpdateField)
+                                    TelegramObject, UPDATE_FIELDS,
+                                    UpdateField, get_update_field)
 from telegrambotclient.bot import TelegramBot, logger
 from telegrambotclient.handler import (
     CallbackQueryHandler, ChannelPostHandler, ChatJoinRequestHandler,
     ChatMemberHandler, ChosenInlineResultHandler, CommandHandler,
     EditedChannelPostHandler, EditedMessageHandler, ErrorHandler,
     ForceReplyHandler, InlineQueryHandler, MessageHandler, MyChatMemberHandler,
-    PollAnswerHandler, PollHandler, PreCheckoutQueryHandler,
+    PollAnswerHandler, PollHandler, PreCheckoutQueryHandler, RegexHandler,
     ShippingQueryHandler, UpdateHandler, _MessageHandler)
-from telegrambotclient.utils import parse_callback_data, pretty_format
+from telegrambotclient.utils import (parse_callback_data, parse_command_args,
+                                     pretty_format)
 
 
 async def call_handler(handler: UpdateHandler, *args, **kwargs):
@@ -27,12 +33,16 @@ class ListRoute(UserList):
         for idx, _handler in enumerate(self):
             if _handler.callback_name == handler.callback_name:
                 self[idx] = handler
-                return
+                return self
         self.data.append(handler)
         return self
 
+    def freeze(self):
+        self.data = tuple(self.data)
+        return self
+
     async def call_handlers(self, bot: TelegramBot, data: TelegramObject):
-        for handler in self:
+        for handler in self.data:
             if await call_handler(handler, bot, data) is bot.stop_call:
                 return bot.stop_call
         return bot.next_call
@@ -41,35 +51,77 @@ class ListRoute(UserList):
 class ErrorRoute(ListRoute):
     async def call_handlers(self, bot: TelegramBot, data: TelegramObject,
                             error: Exception) -> bool:
-        for handler in self:
-            print(error, handler.errors)
+        for handler in self.data:
             if isinstance(error, handler.errors) and await call_handler(
                     handler, bot, data, error) is bot.stop_call:
                 return bot.stop_call
         return bot.next_call
 
 
-class CommandRoute(UserDict):
+class DictRoute(UserDict):
+    def freeze(self):
+        self.data = MappingProxyType(self.data)
+        return self
+
+
+def get_entity_span(text: str, entity) -> Tuple[int, int]:
+    # offsets of entities are in utf-16 code units
+    offset, length = entity["offset"], entity["length"]
+    if text.isascii():
+        return offset, offset + length
+    encoded_text = text.encode("utf-16-le")
+    start = len(encoded_text[:offset * 2].decode("utf-16-le", "replace"))
+    return start, start + len(encoded_text[offset * 2:(offset + length) *
+                                           2].decode("utf-16-le", "replace"))
+
+
+class CommandRoute(DictRoute):
+    # "/Start", "/start" and "start" are a same command
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._usernames = {}
+
+    @classmethod
+    def get_command_key(cls, cmd_text: str) -> str:
+        return "/{0}".format(cmd_text.lstrip("/").lower())
+
     def add_handler(self, handler: CommandHandler):
         for cmd_text in handler.cmds:
-            self[cmd_text] = handler
+            self[self.get_command_key(cmd_text)] = handler
         return self
 
-    async def call_handlers(self, bot: TelegramBot, message: Message):
-        entity = message.entities[0]
-        bot_command = message.text[entity.offset:entity.length]
-        cmd_text, *bot_username = tuple(bot_command.split("@"))
-        #for /start@one_bot arg1 arg2 ...
-        if bot_username and bot_username != bot.user.username:
-            return bot.stop_call
-        handler = self.get(cmd_text, None)
-        if handler is None:
-            return bot.stop_call
-        bot_command, *args = tuple(message.text.split())
-        return await call_handler(handler, bot, message, *args)
-
+    def get_bot_username(self, bot: TelegramBot) -> str:
+        username = self._usernames.get(bot.token, None)
+        if username is None:
+            username = self._usernames[bot.token] = (bot.user.username
+                                                     or "").lower()
+        return username
 
-class ForceReplyRoute(UserDict):
+    async def call_handlers(self, bot: TelegramBot, message: Message):
+        text = message.get("text", None) or ""
+        has_command = False
+        for entity in message.get("entities", None) or ():
+            if entity["type"] != "bot_command":
+                continue
+            has_command = True
+            start, end = get_entity_span(text, entity)
+            #for /start@one_bot arg1 arg2 ...
+            cmd_text, _, bot_username = text[start:end].partition("@")
+            if bot_username and bot_username.lower(
+            ) != self.get_bot_username(bot):
+                continue
+            handler = self.data.get(cmd_text.lower(), None)
+            if handler is None:
+                continue
+            if handler.with_args:
+                return await call_handler(handler, bot, message,
+                                          *parse_command_args(text[end:]))
+            return await call_handler(handler, bot, message)
+        # commands for other bots or without handlers go no further
+        return bot.stop_call if has_command else bot.next_call
+
+
+class ForceReplyRoute(DictRoute):
     def add_handler(self, handler: ForceReplyHandler):
         self[handler.callback_name] = handler
         return self
@@ -83,7 +135,7 @@ class ForceReplyRoute(UserDict):
                 "message_id"]:
             return bot.stop_call
 
-        handler = self.get(reply_to_message["callback"], None)
+        handler = self.data.get(reply_to_message["callback"], None)
         if handler is None:
             raise TelegramBotException(
                 "{0} is not found as a force reply callback".format(
@@ -95,7 +147,112 @@ class ForceReplyRoute(UserDict):
             handler, bot, message)
 
 
+class RegexRoute(ListRoute):
+    # patterns are tried in order of registration by one combined alternation,
+    # patterns with backreferences are tried one by one
+    GROUP_NAME_PATTERN = re.compile(r"(?<!\\)((?:\\\\)*)\(\?P<\w+>")
+    GROUP_REF_PATTERN = re.compile(r"\(\?P=|\(\?\(|\\[1-9]")
+    GLOBAL_FLAGS_PATTERN = re.compile(r"^\(\?[aiLmsux]+\)")
+    SCOPED_FLAGS = ((re.ASCII, "a"), (re.IGNORECASE, "i"), (re.MULTILINE, "m"),
+                    (re.DOTALL, "s"), (re.VERBOSE, "x"))
+
+    def __init__(self, initlist=None):
+        super().__init__(initlist)
+        self._compiled = None
+
+    def add_handler(self, handler: RegexHandler):
+        self._compiled = None
+        return super().add_handler(handler)
+
+    def freeze(self):
+        super().freeze()
+        self.__compile__()
+        return self
+
+    @classmethod
+    def __get_alternative__(cls, position: int, pattern):
+        # the pattern in a named group of the combined pattern, None if it can not be combined
+        if not isinstance(pattern.pattern, str) or (
+                pattern.groups
+                and cls.GROUP_REF_PATTERN.search(pattern.pattern)):
+            return None
+        flags = "".join(flag for value, flag in cls.SCOPED_FLAGS
+                        if pattern.flags & value)
+        # the combined pattern finds a matched pattern only, its groups are not needed
+        source = cls.GROUP_NAME_PATTERN.sub(
+            r"\1(", cls.GLOBAL_FLAGS_PATTERN.sub("", pattern.pattern))
+        alternative = "(?P<_{0}>(?{1}:{2}{3}))".format(
+            position, flags, source, "\n" if pattern.flags & re.VERBOSE else "")
+        try:
+            re.compile(alternative)
+        except re.error:
+            return None
+        return alternative
+
+    def __compile__(self):
+        entries = tuple((pattern, handler) for handler in self.data
+                        for pattern in handler.patterns)
+        alternatives, standalone = [], []
+        for position, (pattern, _) in enumerate(entries):
+            alternative = self.__get_alternative__(position, pattern)
+            if alternative is None:
+                standalone.append(position)
+            else:
+                alternatives.append(alternative)
+        combined_pattern = re.compile(
+            "|".join(alternatives)) if alternatives else None
+        self._compiled = (entries, combined_pattern, tuple(standalone))
+        return self._compiled
+
+    def __match__(self, text: str, start: int = 0):
+        # the first matched pattern from start
+        entries, combined_pattern, standalone = self._compiled or self.__compile__(
+        )
+        if start or combined_pattern is None:
+            for position in range(start, len(entries)):
+                match_result = entries[position][0].match(text)
+                if match_result:
+                    return position, match_result
+            return None, None
+        combined_result = combined_pattern.match(text)
+        matched_position = int(combined_result.lastgroup[1:]
+                               ) if combined_result else len(entries)
+        for position in standalone:
+            if position > matched_position:
+                break
+            match_result = entries[position][0].match(text)
+            if match_result:
+                return position, match_result
+        if combined_result is None:
+            return None, None
+        # groups of the pattern itself for its handler
+        return matched_position, entries[matched_position][0].match(text)
+
+    async def call_handlers(self, bot: TelegramBot, message: Message):
+        text = message.get("text", None)
+        if not text:
+            return bot.next_call
+        position, match_result = self.__match__(text)
+        while match_result:
+            if await call_handler(self._compiled[0][position][1], bot, message,
+                                  match_result) is bot.stop_call:
+                return bot.stop_call
+            position, match_result = self.__match__(text, position + 1)
+        return bot.next_call
+
+
 class MessageRoute(UserList):
+    # a message is reduced to a mask of the watched fields it has,
+    # handlers of a mask are looked up by an inverted index once and cached
+    MAX_MATCHES = 1024
+
+    def __init__(self, initlist=None):
+        super().__init__(initlist)
+        self._bits = None
+        self._masks = None
+        self._index = None
+        self._matches = None
+
     def add_handler(self, handler: _MessageHandler):
         if handler.fields:
             # must be inserted before processing all message fields' handlers
@@ -104,64 +261,182 @@ class MessageRoute(UserList):
                 for field in handler.fields), handler), )
         else:
             self.append((set(), handler))
+        self._bits = None
         return self
 
+    def freeze(self):
+        self.data = tuple((frozenset(watching_message_fields), handler)
+                          for watching_message_fields, handler in self.data)
+        self.__compile__()
+        return self
+
+    def __compile__(self):
+        # a bit per watched message field
+        bits = {}
+        for watching_message_fields, _ in self.data:
+            for field in watching_message_fields:
+                if field not in bits:
+                    bits[field] = 1 << len(bits)
+        # bit -> positions of handlers watching the field, 0 for handlers of all messages
+        index = defaultdict(list)
+        masks = []
+        for position, (watching_message_fields, _) in enumerate(self.data):
+            mask = 0
+            for field in watching_message_fields:
+                mask |= bits[field]
+                index[bits[field]].append(position)
+            if not mask:
+                index[0].append(position)
+            masks.append(mask)
+        self._masks = tuple(masks)
+        self._index = dict(index)
+        self._matches = {}
+        self._bits = bits
+        return bits
+
+    def __match__(self, mask: int):
+        positions = set(self._index.get(0, ()))
+        remaining_mask = mask
+        while remaining_mask:
+            bit = remaining_mask & -remaining_mask
+            positions.update(self._index[bit])
+            remaining_mask ^= bit
+        masks = self._masks
+        handlers = tuple(self.data[position][1]
+                         for position in sorted(positions)
+                         if masks[position] & mask == masks[position])
+        if len(self._matches) >= self.MAX_MATCHES:
+            self._matches.clear()
+        self._matches[mask] = handlers
+        return handlers
+
+    def get_handlers(self, message: Message):
+        bits = self._bits
+        if bits is None:
+            bits = self.__compile__()
+        mask = 0
+        for name in message:
+            mask |= bits.get(name, 0)
+        handlers = self._matches.get(mask, None)
+        if handlers is None:
+            handlers = self.__match__(mask)
+        return handlers
+
     async def call_handlers(self, bot: TelegramBot, message: Message):
-        message_fields = set(message.keys())
-        for watching_message_fields, handler in self:
-            if message_fields & watching_message_fields == watching_message_fields and await call_handler(
-                    handler, bot, message) is bot.stop_call:
+        for handler in self.get_handlers(message):
+            if await call_handler(handler, bot, message) is bot.stop_call:
                 return bot.stop_call
 
         return bot.next_call
 
 
-class CallbackQueryRoute(UserDict):
+class _TrieNode:
+    __slots__ = ("children", "handler")
+
+    def __init__(self):
+        self.children = {}
+        # the handler of "<prefix>:*"
+        self.handler = None
+
+
+class CallbackQueryRoute(DictRoute):
+    # "button|[args]" goes to the handler of "button|[args]", then "button",
+    # then the handlers of "button:*" prefixes from the longest to "*"
+    SEP = ":"
+    WILDCARD = "*"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._trie = None
+
     def add_handler(self, handler: CallbackQueryHandler):
         self[handler.data] = handler
+        self._trie = None
         return self
 
+    def freeze(self):
+        super().freeze()
+        self.__compile__()
+        return self
+
+    def __compile__(self):
+        trie = _TrieNode()
+        suffix = self.SEP + self.WILDCARD
+        for pattern, handler in self.data.items():
+            if pattern == self.WILDCARD:
+                trie.handler = handler
+            elif pattern.endswith(suffix):
+                node = trie
+                for segment in pattern[:-len(suffix)].split(self.SEP):
+                    child = node.children.get(segment, None)
+                    if child is None:
+                        child = node.children[segment] = _TrieNode()
+                    node = child
+                node.handler = handler
+        self._trie = trie
+        return trie
+
+    def get_prefix_handlers(self, button_name: str):
+        # from the longest prefix
+        trie = self._trie
+        if trie is None:
+            trie = self.__compile__()
+        if not trie.children:
+            return (trie.handler, ) if trie.handler else ()
+        handlers = [trie.handler] if trie.handler else []
+        node = trie
+        # the last segment is not a prefix
+        for segment in button_name.split(self.SEP)[:-1]:
+            node = node.children.get(segment, None)
+            if node is None:
+                break
+            if node.handler:
+                handlers.append(node.handler)
+        handlers.reverse()
+        return handlers
+
     async def call_handlers(self, bot: TelegramBot,
                             callback_query: CallbackQuery):
-        handler = self.get(callback_query.data, None)
+        callback_data = callback_query.get("data", None) or callback_query.get(
+            "game_short_name", None) or ""
+        handler = self.data.get(callback_data, None)
         if handler and await call_handler(handler, bot,
                                           callback_query) is bot.stop_call:
             return bot.stop_call
-        if "|" in callback_query.data:
-            button_name, args = parse_callback_data(callback_query.data)
-            handler = self.get(button_name, None)
-            if handler and await call_handler(handler, bot, callback_query, *
-                                              args) is bot.stop_call:
+        button_name, _, value = callback_data.partition("|")
+        handlers = self.get_prefix_handlers(button_name)
+        if value:
+            button_handler = self.data.get(button_name, None)
+            if button_handler:
+                handlers = (button_handler, *handlers)
+        args = None
+        for handler in handlers:
+            if not handler.with_args:
+                if await call_handler(handler, bot,
+                                      callback_query) is bot.stop_call:
+                    return bot.stop_call
+                continue
+            if args is None:
+                args = parse_callback_data(callback_data)[1] if value else ()
+            if await call_handler(handler, bot, callback_query, *
+                                  args) is bot.stop_call:
                 return bot.stop_call
 
         return bot.next_call
 
 
 class TelegramRouter:
-    __slots__ = ("name", "route_map", "_handler_callers")
-    UPDATE_FIELD_VALUES = UpdateField.__members__.values()
+    __slots__ = ("name", "route_map", "_dispatch_table", "_error_route",
+                 "_frozen")
+    UPDATE_FIELD_VALUES = UPDATE_FIELDS
 
     def __init__(self, name):
         self.name = name
         self.route_map = {}
-        self._handler_callers = {
-            UpdateField.MESSAGE: self.call_message_handlers,
-            UpdateField.EDITED_MESSAGE: self.call_edited_message_handlers,
-            UpdateField.CALLBACK_QUERY: self.call_callback_query_handlers,
-            UpdateField.CHANNEL_POST: self.call_channel_post_handlers,
-            UpdateField.EDITED_CHANNEL_POST:
-            self.call_edited_channel_post_handlers,
-            UpdateField.INLINE_QUERY: self.call_inline_query_handlers,
-            UpdateField.CHOSEN_INLINE_RESULT:
-            self.call_chosen_inline_result_handlers,
-            UpdateField.SHIPPING_QUERY: self.call_shipping_query_handlers,
-            UpdateField.PRE_CHECKOUT_QUERY:
-            self.call_pre_checkout_query_handlers,
-            UpdateField.POLL: self.call_poll_handlers,
-            UpdateField.POLL_ANSWER: self.call_poll_answer_handlers,
-            UpdateField.MY_CHAT_MEMBER: self.call_my_chat_member_handlers,
-            UpdateField.CHAT_MEMBER: self.call_chat_member_handlers
-        }
+        # update field -> the caller of its routes, compiled on the first update
+        self._dispatch_table = None
+        self._error_route = None
+        self._frozen = False
 
     def register_handlers(self, handlers):
         for handler in handlers:
@@ -169,42 +444,40 @@ class TelegramRouter:
 
     def register_handler(self, handler: UpdateHandler):
         assert isinstance(handler, UpdateHandler), True
+        if self._frozen:
+            raise TelegramBotException(
+                "router {0} is frozen, register handlers before freeze()".
+                format(self.name))
         update_field = handler.update_field
         logger.info("bind a %s handler: '%s@%s'", update_field,
                     handler.callback_name, self.name)
+        self._dispatch_table = None
 
-        route_data = self.route_map.get(update_field, {})
         if isinstance(handler, CallbackQueryHandler):
-            self.route_map[update_field] = CallbackQueryRoute(
-                route_data).add_handler(handler)
-            return self
-        if isinstance(handler, CommandHandler):
-            self.route_map[update_field] = CommandRoute(
-                route_data).add_handler(handler)
+            route_class = CallbackQueryRoute
+        elif isinstance(handler, CommandHandler):
+            route_class = CommandRoute
             if UpdateField.MESSAGE.value not in self.route_map:
-                self.route_map[UpdateField.MESSAGE.value] = []
-            return self
-
-        if isinstance(handler, ForceReplyHandler):
-            self.route_map[update_field] = ForceReplyRoute(
-                route_data).add_handler(handler)
-            return self
-
-        route_data = self.route_map.get(update_field, [])
-        if isinstance(handler, (MessageHandler, EditedMessageHandler,
-                                ChannelPostHandler, EditedChannelPostHandler)):
-            self.route_map[update_field] = MessageRoute(
-                route_data).add_handler(handler)
-            return self
-
-        if isinstance(handler, ErrorHandler):
-            self.route_map[update_field] = ErrorRoute(route_data).add_handler(
-                handler)
-            return self
-
-        # for others update handlers, using listroute
-        self.route_map[update_field] = ListRoute(route_data).add_handler(
-            handler)
+                self.route_map[UpdateField.MESSAGE.value] = MessageRoute()
+        elif isinstance(handler, RegexHandler):
+            route_class = RegexRoute
+            if UpdateField.MESSAGE.value not in self.route_map:
+                self.route_map[UpdateField.MESSAGE.value] = MessageRoute()
+        elif isinstance(handler, ForceReplyHandler):
+            route_class = ForceReplyRoute
+        elif isinstance(handler, (MessageHandler, EditedMessageHandler,
+                                  ChannelPostHandler,
+                                  EditedChannelPostHandler)):
+            route_class = MessageRoute
+        elif isinstance(handler, ErrorHandler):
+            route_class = ErrorRoute
+        else:
+            # for others update handlers, using listroute
+            route_class = ListRoute
+        route = self.route_map.get(update_field, None)
+        if route is None:
+            route = self.route_map[update_field] = route_class()
+        route.add_handler(handler)
         return self
 
     def register_error_handler(self, callback: Callable, *errors):
@@ -213,6 +486,9 @@ class TelegramRouter:
     def register_command_handler(self, callback: Callable, *cmds):
         return self.register_handler(CommandHandler(callback, *cmds))
 
+    def register_regex_handler(self, callback: Callable, *patterns):
+        return self.register_handler(RegexHandler(callback, *patterns))
+
     def register_force_reply_handler(self, callback: Callable):
         return self.register_handler(ForceReplyHandler(callback))
 
@@ -236,9 +512,10 @@ class TelegramRouter:
     def register_chosen_inline_result_handler(self, callback: Callable):
         return self.register_handler(ChosenInlineResultHandler(callback))
 
-    def register_callback_query_handler(self, callback: Callable,
-                                        callback_data: Optional[str],
-                                        game_short_name: Optional[str]):
+    def register_callback_query_handler(self,
+                                        callback: Callable,
+                                        callback_data: Optional[str] = None,
+                                        game_short_name: Optional[str] = None):
         return self.register_handler(
             CallbackQueryHandler(callback=callback,
                                  callback_data=callback_data,
@@ -280,6 +557,13 @@ class TelegramRouter:
 
         return decorator
 
+    def regex_handler(self, *patterns):
+        def decorator(callback):
+            self.register_regex_handler(callback, *patterns)
+            return callback
+
+        return decorator
+
     def force_reply_handler(self):
         def decorator(callback):
             self.register_force_reply_handler(callback)
@@ -336,8 +620,9 @@ class TelegramRouter:
 
         return decorator
 
-    def callback_query_handler(self, callback_data: Optional[str],
-                               game_short_name: Optional[str]):
+    def callback_query_handler(self,
+                               callback_data: Optional[str] = None,
+                               game_short_name: Optional[str] = None):
         def decorator(callback):
             self.register_callback_query_handler(callback, callback_data,
                                                  game_short_name)
@@ -399,127 +684,178 @@ class TelegramRouter:
     # handler callers
     #
     ##################################################################################
+    def freeze(self):
+        # no more handlers, routes become immutable and are compiled once
+        for route in self.route_map.values():
+            route.freeze()
+        self._frozen = True
+        self.__compile__()
+        return self
+
+    @property
+    def frozen(self) -> bool:
+        return self._frozen
+
+    def __get_route__(self, update_field: str, route_class):
+        route = self.route_map.get(update_field, None)
+        return route_class() if route is None else route
+
+    def __compile__(self):
+        dispatch_table = {}
+        for update_field, route in self.route_map.items():
+            if update_field in (UpdateField.MESSAGE.value,
+                                UpdateField.EDITED_MESSAGE.value):
+                dispatch_table[update_field] = partial(
+                    self.__call_message_routes__,
+                    self.__get_route__("command", CommandRoute),
+                    self.__get_route__("force_reply", ForceReplyRoute),
+                    self.__get_route__("regex", RegexRoute), route)
+            elif update_field in self.UPDATE_FIELD_VALUES:
+                dispatch_table[update_field] = route.call_handlers
+        self._error_route = self.__get_route__("error", ErrorRoute)
+        self._dispatch_table = dispatch_table
+        return dispatch_table
+
     @classmethod
     def __parse_update_field_and_data__(cls, update: TelegramObject):
-        for name, value in update.items():
-            # telegram bot api confirmed: At most one of the optional parameters can be present in any given update.
-            if name in cls.UPDATE_FIELD_VALUES and value:
-                return name, TelegramObject(**value)
-        raise TelegramBotException("unknown update field: {0}".format(
-            pretty_format(update)))
+        update_field = get_update_field(update)
+        if update_field is None:
+            raise TelegramBotException("unknown update field: {0}".format(
+                pretty_format(update)))
+        # parsed in place, no copy of the payload
+        return update_field, update[update_field]
 
     async def dispatch(self, bot: TelegramBot, update: TelegramObject):
-        logger.debug(
-            "\n----------------------------- update ----------------------------------\n%s",
-            pretty_format(update))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "\n----------------------------- update ----------------------------------\n%s",
+                pretty_format(update))
         update_field, data = self.__parse_update_field_and_data__(update)
-        route = self.route_map.get(update_field, None)
-        if route is not None:
+        await self.route(bot, update_field, data)
+
+    async def route(self, bot: TelegramBot, update_field: str,
+                    data: TelegramObject):
+        # for updates whose field is known already
+        dispatch_table = self._dispatch_table
+        if dispatch_table is None:
+            dispatch_table = self.__compile__()
+        caller = dispatch_table.get(update_field, None)
+        if caller is not None:
             try:
-                await self._handler_callers[update_field](bot, data)
+                await caller(bot, data)
             except Exception as error:
-                await ErrorRoute(self.route_map.get("error", [])
-                                 ).call_handlers(bot, data, error)
+                await self._error_route.call_handlers(bot, data, error)
                 raise error
 
-    async def call_message_handlers(self, bot: TelegramBot, message: Message):
-        if message.entities and message.entities[
-                0].type == "bot_command" and await CommandRoute(
-                    self.route_map.get("command", {})).call_handlers(
-                        bot, message) is bot.stop_call:
+    @classmethod
+    async def __call_message_routes__(cls, command_route: CommandRoute,
+                                      force_reply_route: ForceReplyRoute,
+                                      regex_route: RegexRoute,
+                                      message_route: MessageRoute,
+                                      bot: TelegramBot, message: Message):
+        if message.get("entities",
+                       None) and await command_route.call_handlers(
+                           bot, message) is bot.stop_call:
             return bot.stop_call
 
-        if "reply_to_message" in message and await ForceReplyRoute(
-                self.route_map.get("force_reply", {})).call_handlers(
-                    bot, message) is bot.stop_call:
+        if "reply_to_message" in message and await force_reply_route.call_handlers(
+                bot, message) is bot.stop_call:
             return bot.stop_call
-        route = self.route_map.get(UpdateField.MESSAGE.value, {})
-        return await MessageRoute(route).call_handlers(bot, message)
 
-    async def call_edited_message_handlers(self, bot: TelegramBot,
-                                           edited_message: Message):
-        if edited_message.entities and edited_message.entities[
-                0].type == "bot_command" and await CommandRoute(
-                    self.route_map.get("command", {})).call_handlers(
-                        bot, edited_message) is bot.stop_call:
+        if regex_route and await regex_route.call_handlers(
+                bot, message) is bot.stop_call:
             return bot.stop_call
+        return await message_route.call_handlers(bot, message)
 
-        if "reply_to_message" in edited_message and await ForceReplyRoute(
-                self.route_map.get("force_reply", {})).call_handlers(
-                    bot, edited_message) is bot.stop_call:
-            return bot.stop_call
+    async def call_message_handlers(self, bot: TelegramBot, message: Message):
+        return await self.__call_message_routes__(
+            self.__get_route__("command", CommandRoute),
+            self.__get_route__("force_reply", ForceReplyRoute),
+            self.__get_route__("regex", RegexRoute),
+            self.__get_route__(UpdateField.MESSAGE.value, MessageRoute), bot,
+            message)
 
-        route = self.route_map.get(UpdateField.EDITED_MESSAGE.value, {})
-        return await MessageRoute(route).call_handlers(bot, edited_message)
+    async def call_edited_message_handlers(self, bot: TelegramBot,
+                                           edited_message: Message):
+        return await self.__call_message_routes__(
+            self.__get_route__("command", CommandRoute),
+            self.__get_route__("force_reply", ForceReplyRoute),
+            self.__get_route__("regex", RegexRoute),
+            self.__get_route__(UpdateField.EDITED_MESSAGE.value,
+                               MessageRoute), bot, edited_message)
 
     async def call_channel_post_handlers(self, bot: TelegramBot,
                                          message: Message):
-        return await MessageRoute(
-            self.route_map.get(UpdateField.CHANNEL_POST.value,
-                               {})).call_handlers(bot, message)
+        return await self.__get_route__(UpdateField.CHANNEL_POST.value,
+                                        MessageRoute).call_handlers(
+                                            bot, message)
 
     async def call_edited_channel_post_handlers(self, bot: TelegramBot,
                                                 message: Message):
-        return await MessageRoute(
-            self.route_map.get(UpdateField.EDITED_CHANNEL_POST.value,
-                               {})).call_handlers(bot, message)
+        return await self.__get_route__(UpdateField.EDITED_CHANNEL_POST.value,
+                                        MessageRoute).call_handlers(
+                                            bot, message)
 
     async def call_callback_query_handlers(self, bot: TelegramBot,
                                            callback_query: CallbackQuery):
-        return await CallbackQueryRoute(
-            self.route_map.get(UpdateField.CALLBACK_QUERY.value,
-                               {})).call_handlers(bot, callback_query)
+        return await self.__get_route__(UpdateField.CALLBACK_QUERY.value,
+                                        CallbackQueryRoute).call_handlers(
+                                            bot, callback_query)
 
     async def call_inline_query_handlers(self, bot: TelegramBot,
                                          inline_query: InlineQuery):
-        return await ListRoute(
-            self.route_map.get(UpdateField.INLINE_QUERY.value,
-                               ())).call_handlers(bot, inline_query)
+        return await self.__get_route__(UpdateField.INLINE_QUERY.value,
+                                        ListRoute).call_handlers(
+                                            bot, inline_query)
 
     async def call_chosen_inline_result_handlers(
             self, bot: TelegramBot, chosen_inline_result: ChosenInlineResult):
-        return await ListRoute(
-            self.route_map.get(UpdateField.CHOSEN_INLINE_RESULT.value,
-                               ())).call_handlers(bot, chosen_inline_result)
+        return await self.__get_route__(UpdateField.CHOSEN_INLINE_RESULT.value,
+                                        ListRoute).call_handlers(
+                                            bot, chosen_inline_result)
 
     async def call_shipping_query_handlers(self, bot: TelegramBot,
                                            shipping_query: ShippingQuery):
-        return await ListRoute(
-            self.route_map.get(UpdateField.SHIPPING_QUERY.value,
-                               ())).call_handlers(bot, shipping_query)
+        return await self.__get_route__(UpdateField.SHIPPING_QUERY.value,
+                                        ListRoute).call_handlers(
+                                            bot, shipping_query)
 
     async def call_pre_checkout_query_handlers(
             self, bot: TelegramBot, pre_checkout_query: PreCheckoutQuery):
-        return await ListRoute(
-            self.route_map.get(UpdateField.PRE_CHECKOUT_QUERY.value,
-                               ())).call_handlers(bot, pre_checkout_query)
+        return await self.__get_route__(UpdateField.PRE_CHECKOUT_QUERY.value,
+                                        ListRoute).call_handlers(
+                                            bot, pre_checkout_query)
 
     async def call_poll_handlers(self, bot: TelegramBot, poll: Poll):
-        return await ListRoute(self.route_map.get(UpdateField.POLL.value, ())
-                               ).call_handlers(bot, poll)
+        return await self.__get_route__(UpdateField.POLL.value,
+                                        ListRoute).call_handlers(bot, poll)
 
     async def call_poll_answer_handlers(self, bot: TelegramBot,
                                         poll_answer: PollAnswer):
-        return await ListRoute(
-            self.route_map.get(UpdateField.POLL_ANSWER.value,
-                               ())).call_handlers(bot, poll_answer)
+        return await self.__get_route__(UpdateField.POLL_ANSWER.value,
+                                        ListRoute).call_handlers(
+                                            bot, poll_answer)
 
     async def call_my_chat_member_handlers(
             self, bot: TelegramBot, my_chat_member_updated: ChatMemberUpdated):
-        return await ListRoute(
-            self.route_map.get(UpdateField.MY_CHAT_MEMBER.value,
-                               ())).call_handlers(bot, my_chat_member_updated)
+        return await self.__get_route__(UpdateField.MY_CHAT_MEMBER.value,
+                                        ListRoute).call_handlers(
+                                            bot, my_chat_member_updated)
 
     async def call_chat_member_handlers(
             self, bot: TelegramBot, chat_member_updated: ChatMemberUpdated):
-        return await self.call_my_chat_member_handlers(bot,
-                                                       chat_member_updated)
+        return await self.__get_route__(UpdateField.CHAT_MEMBER.value,
+                                        ListRoute).call_handlers(
+                                            bot, chat_member_updated)
 
-    async def call_chat_join_reqeust_handlers(
+    async def call_chat_join_request_handlers(
             self, bot: TelegramBot, chat_join_request: ChatJoinRequst):
-        return await ListRoute(
-            self.route_map.get(UpdateField.CHAT_JOIN_REQUEST.value,
-                               ())).call_handlers(bot, chat_join_request)
+        return await self.__get_route__(UpdateField.CHAT_JOIN_REQUEST.value,
+                                        ListRoute).call_handlers(
+                                            bot, chat_join_request)
+
+    # the misspelled name of older versions
+    call_chat_join_reqeust_handlers = call_chat_join_request_handlers
 
     def __repr__(self):
         return pretty_format(self.route_map)
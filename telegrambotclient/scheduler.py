@@ -0,0 +1,140 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Callable, Optional
+
+from telegrambotclient.base import TelegramObject, get_update_field
+
+logger = logging.getLogger("telegram-bot-client")
+
+
+def get_update_data(update: TelegramObject):
+    update_field = get_update_field(update)
+    return update.get(update_field, None) if update_field else None
+
+
+def get_user_key(update: TelegramObject):
+    # the sender of a message, a callback query, an inline query, ...
+    data = get_update_data(update)
+    if data is None:
+        return None
+    user = data.get("from_user", None) or data.get("from", None) or data.get(
+        "user", None)
+    return user["id"] if user else None
+
+
+def get_chat_key(update: TelegramObject):
+    data = get_update_data(update)
+    if data is None:
+        return None
+    chat = data.get("chat", None)
+    if chat is None and data.get("message", None):
+        # a callback query of a message
+        chat = data["message"].get("chat", None)
+    if chat:
+        return chat["id"]
+    # inline queries, shipping queries and poll answers have no chat
+    return get_user_key(update)
+
+
+class UpdateScheduler:
+    # updates of a same key are dispatched one by one in order,
+    # updates of different keys are dispatched by workers in parallel
+    __slots__ = ("dispatch", "key", "workers", "max_pending", "pending",
+                 "_queues", "_ready", "_slots", "_idle", "_tasks")
+
+    def __init__(self,
+                 dispatch: Callable,
+                 key: Optional[Callable] = get_chat_key,
+                 workers: int = 16,
+                 max_pending: int = 0):
+        self.dispatch = dispatch
+        self.key = key
+        self.workers = workers
+        self.max_pending = max_pending or workers * 4
+        self.pending = 0
+        self._queues = {}
+        self._ready = None
+        self._slots = None
+        self._idle = None
+        self._tasks = ()
+
+    @property
+    def queue_depths(self):
+        return {key: len(queue) for key, queue in self._queues.items()}
+
+    def get_pending(self, token: str) -> int:
+        return sum(
+            len(queue) for key, queue in self._queues.items()
+            if key[0] == token)
+
+    def start(self):
+        if self._tasks:
+            return
+        self._ready = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._tasks = tuple(
+            asyncio.create_task(self.__work__())
+            for _ in range(self.workers))
+
+    async def submit(self,
+                     bot,
+                     update: TelegramObject,
+                     done: Optional[Callable] = None):
+        # done(update) is called after the update is dispatched
+        self.start()
+        # wait for a free slot when there are max_pending updates
+        await self._slots.acquire()
+        key = self.key(update) if self.key else None
+        # an update without a key has no order to keep
+        key = (bot.token, key if key is not None else object())
+        queue = self._queues.get(key, None)
+        if queue is None:
+            queue = self._queues[key] = deque()
+            self._ready.put_nowait(key)
+        queue.append((bot, update, done))
+        self.pending += 1
+        self._idle.clear()
+
+    async def __work__(self):
+        while True:
+            key = await self._ready.get()
+            queue = self._queues[key]
+            # the update stays in the queue until it is done, so the key is busy
+            bot, update, done = queue[0]
+            try:
+                await self.dispatch(bot, update)
+            except asyncio.CancelledError:
+                # cut off by close(), not done, so it is delivered again
+                done = None
+                raise
+            except Exception:
+                logger.exception("fail to dispatch the update: %s",
+                                 update.get("update_id", None))
+            finally:
+                queue.popleft()
+                if done is not None:
+                    done(update)
+                if queue:
+                    # back to the end of the line, other keys go first
+                    self._ready.put_nowait(key)
+                else:
+                    del self._queues[key]
+                self.pending -= 1
+                self._slots.release()
+                if self.pending == 0:
+                    self._idle.set()
+
+    async def join(self):
+        if self._tasks:
+            await self._idle.wait()
+
+    async def close(self):
+        tasks, self._tasks = self._tasks, ()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._queues.clear()
+        self.pending = 0
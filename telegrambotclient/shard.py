@@ -0,0 +1,195 @@
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from telegrambotclient import codec
+from telegrambotclient.base import TelegramObject
+from telegrambotclient.scheduler import UpdateScheduler, get_chat_key
+
+logger = logging.getLogger("telegram-bot-client")
+
+
+def load_bot_client(client_path: str):
+    # "package.module:bot_client"
+    module_name, _, name = client_path.partition(":")
+    return getattr(importlib.import_module(module_name), name or "bot_client")
+
+
+def run_shard(client_path: str, conn, concurrency: int,
+              key: Optional[Callable]):
+    # the entry of a worker process, bots, routers and connection pools are its own
+    bot_client = load_bot_client(client_path)
+    try:
+        asyncio.run(serve_shard(bot_client, conn, concurrency, key))
+    except KeyboardInterrupt:
+        pass
+
+
+async def serve_shard(bot_client, conn, concurrency: int,
+                      key: Optional[Callable]):
+    loop = asyncio.get_running_loop()
+
+    async def dispatch(bot, update: TelegramObject):
+        router = bot_client.get_bot_router(bot)
+        if router is not None:
+            await router.dispatch(bot, update)
+
+    scheduler = UpdateScheduler(dispatch, key=key, workers=concurrency)
+    with ThreadPoolExecutor(1) as reader:
+        try:
+            while True:
+                try:
+                    frame = await loop.run_in_executor(reader, conn.recv_bytes)
+                except (EOFError, OSError):
+                    # the parent is gone
+                    break
+                for token, raw_update in codec.loads(frame):
+                    bot = bot_client.bots.get(token, None)
+                    if bot is not None:
+                        await scheduler.submit(bot,
+                                               TelegramObject(**raw_update))
+        finally:
+            try:
+                await scheduler.join()
+            finally:
+                await scheduler.close()
+
+
+class _Shard:
+    __slots__ = ("index", "process", "conn", "queue", "sent", "dropped",
+                 "restarts")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.queue = None
+        self.sent = 0
+        self.dropped = 0
+        self.restarts = 0
+
+
+class ShardedDispatcher:
+    # feeds updates to worker processes by a hash of their chats,
+    # updates of a same chat always go to a same worker
+    __slots__ = ("client_path", "concurrency", "key", "maxsize",
+                 "check_interval", "_shards", "_tasks", "_sender",
+                 "_context")
+
+    def __init__(self,
+                 client_path: str,
+                 shards: int = 0,
+                 concurrency: int = 16,
+                 key: Optional[Callable] = get_chat_key,
+                 maxsize: int = 1000,
+                 check_interval: float = 1):
+        self.client_path = client_path
+        self.concurrency = concurrency
+        self.key = key
+        self.maxsize = maxsize
+        self.check_interval = check_interval
+        self._shards = tuple(
+            _Shard(index) for index in range(shards or os.cpu_count() or 1))
+        self._tasks = ()
+        self._sender = None
+        self._context = multiprocessing.get_context("spawn")
+
+    @property
+    def metrics(self):
+        return [{
+            "pid": shard.process.pid if shard.process else None,
+            "alive": bool(shard.process and shard.process.is_alive()),
+            "sent": shard.sent,
+            "dropped": shard.dropped,
+            "queued": shard.queue.qsize() if shard.queue else 0,
+            "restarts": shard.restarts
+        } for shard in self._shards]
+
+    def __spawn__(self, shard: _Shard):
+        parent_conn, child_conn = self._context.Pipe()
+        shard.process = self._context.Process(
+            target=run_shard,
+            args=(self.client_path, child_conn, self.concurrency, self.key),
+            name="telegram-bot-shard-{0}".format(shard.index),
+            daemon=True)
+        shard.process.start()
+        child_conn.close()
+        shard.conn = parent_conn
+
+    def start(self):
+        if self._tasks:
+            return
+        self._sender = ThreadPoolExecutor(len(self._shards))
+        for shard in self._shards:
+            shard.queue = asyncio.Queue(self.maxsize)
+            self.__spawn__(shard)
+        self._tasks = tuple(
+            asyncio.create_task(self.__send__(shard))
+            for shard in self._shards) + (asyncio.create_task(
+                self.__check__()), )
+
+    async def dispatch(self, bot, update: TelegramObject):
+        self.start()
+        key = self.key(update) if self.key else None
+        shard = self._shards[hash(key if key is not None else update.
+                                  update_id) % len(self._shards)]
+        # wait when the worker falls behind
+        await shard.queue.put((bot.token, update))
+
+    async def __send__(self, shard: _Shard):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await shard.queue.get()]
+            while not shard.queue.empty():
+                batch.append(shard.queue.get_nowait())
+            try:
+                # one frame for all queued updates
+                await loop.run_in_executor(self._sender, shard.conn.send_bytes,
+                                           codec.dumpb(batch))
+                shard.sent += len(batch)
+            except OSError:
+                shard.dropped += len(batch)
+                logger.exception("fail to send %s updates to shard %s",
+                                 len(batch), shard.index)
+            finally:
+                for _ in batch:
+                    shard.queue.task_done()
+
+    async def __check__(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.check_interval)
+            for shard in self._shards:
+                if not shard.process.is_alive():
+                    logger.error("shard %s exits with %s, restart it",
+                                 shard.index, shard.process.exitcode)
+                    shard.conn.close()
+                    shard.restarts += 1
+                    await loop.run_in_executor(None, self.__spawn__, shard)
+
+    async def join(self):
+        # wait until all updates are sent to workers
+        for shard in self._shards:
+            if shard.queue is not None:
+                await shard.queue.join()
+
+    async def close(self, timeout: float = 10):
+        tasks, self._tasks = self._tasks, ()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        loop = asyncio.get_running_loop()
+        for shard in self._shards:
+            if shard.process is None:
+                continue
+            # a closed pipe tells the worker to finish its updates and exit
+            shard.conn.close()
+            await loop.run_in_executor(None, shard.process.join, timeout)
+            if shard.process.is_alive():
+                shard.process.terminate()
+        if self._sender is not None:
+            self._sender.shutdown(wait=False)
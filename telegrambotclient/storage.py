@@ -1,12 +1,12 @@
-try:
-    import ujson as json
-except ImportError:
-    import json
-
+import hashlib
+import os
+import threading
 import time
-from collections import UserDict
-from typing import Any
+from collections import OrderedDict, UserDict, deque
+from typing import Any, Optional
 
+from telegrambotclient import codec
+from telegrambotclient.base import InputFile
 from telegrambotclient.utils import pretty_format
 
 
@@ -54,6 +54,9 @@ class TelegramStorage:
             self._data[key] = session_data
         return session_data
 
+    def close(self):
+        pass
+
 
 class SQLiteStorage(TelegramStorage):
     __slots__ = ("_db_conn", )
@@ -81,7 +84,7 @@ class SQLiteStorage(TelegramStorage):
                 self._db_conn.execute(
                     "UPDATE t_session SET expires=? WHERE key=?",
                     (current_time + expires, key))
-                return json.loads(row_data[0]).get(field, None)
+                return codec.loads(row_data[0]).get(field, None)
             return None
 
     def update_fields(self, key: str, mapping, expires: int) -> bool:
@@ -91,14 +94,14 @@ class SQLiteStorage(TelegramStorage):
             row_data = cur.fetchone()
             current_time = int(time.time())
             if row_data:
-                data = json.loads(row_data[0])
+                data = codec.loads(row_data[0])
                 if row_data[1] >= current_time:
                     data.update(mapping)
                 else:
                     data = mapping
                 cur = self._db_conn.execute(
                     "UPDATE t_session SET data=?, expires=? WHERE key=?",
-                    (json.dumps(data), current_time + expires, key))
+                    (codec.dumps(data), current_time + expires, key))
                 return cur.rowcount > 0
 
             cur = self._db_conn.execute(
@@ -108,7 +111,7 @@ class SQLiteStorage(TelegramStorage):
                     data,
                     expires
                 ) VALUES (?, ?, ?)
-                """, (key, json.dumps(mapping), current_time + expires))
+                """, (key, codec.dumps(mapping), current_time + expires))
             return cur.lastrowid >= 0
 
     def delete_fields(self, key: str, *fields, expires: int) -> bool:
@@ -120,13 +123,13 @@ class SQLiteStorage(TelegramStorage):
                 current_time = int(time.time())
                 if row_data[1] < current_time:
                     return False
-                data = json.loads(row_data[0])
+                data = codec.loads(row_data[0])
                 for field in fields:
                     if field in data:
                         del data[field]
                 cur = self._db_conn.execute(
                     "UPDATE t_session SET data=?, expires=? WHERE key=?",
-                    (json.dumps(data), current_time + expires, key))
+                    (codec.dumps(data), current_time + expires, key))
                 return cur.rowcount > 0
             return False
 
@@ -146,12 +149,15 @@ class SQLiteStorage(TelegramStorage):
                 return {}
             self._db_conn.execute("UPDATE t_session SET expires=? WHERE key=?",
                                   (current_time + expires, key))
-            return json.loads(row_data[0])
+            return codec.loads(row_data[0])
         return {}
 
-    def __del__(self):
+    def close(self):
         self._db_conn.close()
 
+    def __del__(self):
+        self.close()
+
 
 class RedisStorage(TelegramStorage):
     __slots__ = ("_redis", )
@@ -164,7 +170,7 @@ class RedisStorage(TelegramStorage):
             return None
         self._redis.expire(key, expires)
         value = self._redis.hget(key, field)
-        return json.loads(value)[0] if value else None
+        return codec.loads(value)[0] if value else None
 
     def delete_fields(self, key: str, *fields, expires: int) -> bool:
         if self._redis.exists(key) != 1:
@@ -175,7 +181,7 @@ class RedisStorage(TelegramStorage):
     def update_fields(self, key: str, field_mapping, expires: int) -> bool:
         data = self._redis.hgetall(key)
         data.update({
-            field: json.dumps((value, ))
+            field: codec.dumps((value, ))
             for field, value in field_mapping.items()
         })
         self._redis.expire(key, expires)
@@ -189,13 +195,16 @@ class RedisStorage(TelegramStorage):
             return {}
         self._redis.expire(key, expires)
         return {
-            field: json.loads(value)[0]
+            field: codec.loads(value)[0]
             for field, value in self._redis.hgetall(key).items()
         }
 
-    def __del__(self):
+    def close(self):
         self._redis.close()
 
+    def __del__(self):
+        self.close()
+
 
 class MongoDBStorage(TelegramStorage):
     __slots__ = ("_session")
@@ -269,6 +278,244 @@ class MongoDBStorage(TelegramStorage):
             }}) or {}
 
 
+class FileIdCache:
+    # parameters of send* methods which can take a file_id instead of a file
+    MEDIA_FIELDS = ("photo", "document", "video", "audio", "animation",
+                    "voice", "video_note", "sticker")
+    KEY_FORMAT = "file_id:{0}"
+    __slots__ = ("storage", "maxsize", "expires", "_cache", "_lock")
+
+    def __init__(self,
+                 storage: Optional[TelegramStorage] = None,
+                 maxsize: int = 4096,
+                 expires: int = 30 * 86400):
+        self.storage = storage
+        self.maxsize = maxsize
+        self.expires = expires
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._cache.get(key, None)
+            if value is not None:
+                self._cache.move_to_end(key)
+                return value
+        if self.storage is not None:
+            value = self.storage.get_field(self.KEY_FORMAT.format(key),
+                                           "value", self.expires)
+            if value is not None:
+                self.__cache__(key, value)
+        return value
+
+    def set(self, key: str, value: str):
+        self.__cache__(key, value)
+        if self.storage is not None:
+            self.storage.update_fields(self.KEY_FORMAT.format(key),
+                                       {"value": value}, self.expires)
+
+    def __cache__(self, key: str, value: str):
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def digest(self, input_file: InputFile) -> str:
+        stat_key = None
+        if input_file.path:
+            # path, mtime and size are a fast key of an unchanged file
+            stat = os.stat(input_file.path)
+            stat_key = "stat:{0}:{1}:{2}".format(input_file.path,
+                                                 stat.st_mtime_ns,
+                                                 stat.st_size)
+            digest = self.get(stat_key)
+            if digest:
+                return digest
+        hash_obj = hashlib.blake2b(digest_size=20)
+        for chunk in input_file.iter_chunks():
+            hash_obj.update(chunk)
+        digest = hash_obj.hexdigest()
+        if stat_key:
+            self.set(stat_key, digest)
+        return digest
+
+    def substitute(self, token: str, api_name: str, data: dict, files: list):
+        # replace files which have been uploaded with their file_ids
+        api_name = api_name.replace("_", "").lower()
+        if not api_name.startswith(("send", "editmessagemedia")):
+            return files, None
+        bot_id = token.split(":", 1)[0]
+        media = codec.loads(data["media"]) if isinstance(
+            data.get("media", None), str) else None
+        attached = {}
+        if media is not None:
+            for index, item in enumerate(
+                    media if isinstance(media, list) else (media, )):
+                if item.get("media", "").startswith("attach://"):
+                    attached[item["media"][9:]] = (
+                        index if isinstance(media, list) else None, item)
+        remaining_files, uploads, media_changed = [], [], False
+        # a thumbnail is ignored if its file is sent by a file_id
+        useless_thumbs = set()
+        for field, input_file in files:
+            if field in self.MEDIA_FIELDS:
+                kind, index, item = field, None, None
+            elif field in attached:
+                index, item = attached[field]
+                kind = item["type"]
+            else:
+                remaining_files.append((field, input_file))
+                continue
+            key = "{0}:{1}:{2}".format(bot_id, kind, self.digest(input_file))
+            file_id = self.get(key)
+            if file_id is None:
+                remaining_files.append((field, input_file))
+                uploads.append((key, kind, index))
+                continue
+            thumb = data.pop("thumb", None) if item is None else item.pop(
+                "thumb", None)
+            if isinstance(thumb, str) and thumb.startswith("attach://"):
+                useless_thumbs.add(thumb[9:])
+            if item is None:
+                data[field] = file_id
+            else:
+                item["media"] = file_id
+                media_changed = True
+        if media_changed:
+            data["media"] = codec.dumps(media)
+        if useless_thumbs:
+            remaining_files = [
+                file for file in remaining_files
+                if file[0] not in useless_thumbs
+            ]
+        return remaining_files, uploads
+
+    def record(self, token: str, uploads: list, result):
+        for key, kind, index in uploads:
+            message = result[index] if index is not None else result
+            if not isinstance(message, dict):
+                continue
+            media = message.get(kind, None)
+            if isinstance(media, list) and media:
+                # the largest size of a photo
+                media = media[-1]
+            if isinstance(media, dict) and "file_id" in media:
+                self.set(key, media["file_id"])
+
+
+class _CheckpointState:
+    __slots__ = ("offset", "last_update_id", "in_flight", "done", "seen",
+                 "seen_ids", "dirty")
+
+    def __init__(self, offset: int, done, window: int):
+        # all updates before offset are done
+        self.offset = offset
+        self.last_update_id = offset - 1
+        self.in_flight = set()
+        # done updates after offset
+        self.done = set(done)
+        self.seen = deque(maxlen=window)
+        self.seen_ids = set()
+        self.dirty = False
+        for update_id in sorted(self.done):
+            self.see(update_id)
+
+    def see(self, update_id: int):
+        if len(self.seen) == self.seen.maxlen:
+            self.seen_ids.discard(self.seen[0])
+        self.seen.append(update_id)
+        self.seen_ids.add(update_id)
+        self.last_update_id = max(self.last_update_id, update_id)
+
+
+class UpdateCheckpoint:
+    # commits done updates of bots and drops duplicated updates
+    KEY_FORMAT = "update_checkpoint:{0}"
+    __slots__ = ("storage", "window", "flush_interval", "expires",
+                 "duplicates", "_states")
+
+    def __init__(self,
+                 storage: Optional[TelegramStorage] = None,
+                 window: int = 1024,
+                 flush_interval: float = 1,
+                 expires: int = 7 * 86400):
+        self.storage = storage
+        self.window = window
+        self.flush_interval = flush_interval
+        self.expires = expires
+        self.duplicates = 0
+        self._states = {}
+
+    def __state__(self, bot_id: int) -> _CheckpointState:
+        state = self._states.get(bot_id, None)
+        if state is None:
+            offset, done = 0, ()
+            if self.storage is not None:
+                data = self.storage.data(self.KEY_FORMAT.format(bot_id),
+                                         self.expires)
+                offset, done = data.get("offset", 0), data.get("done", ())
+            state = self._states[bot_id] = _CheckpointState(
+                offset, done, self.window)
+        return state
+
+    def load(self, bot_id: int) -> int:
+        # the offset to resume from
+        return self.__state__(bot_id).offset
+
+    def receive(self, bot_id: int, update_id: int) -> bool:
+        # False for an update which is done or being handled
+        state = self.__state__(bot_id)
+        if update_id < state.offset or update_id in state.seen_ids:
+            self.duplicates += 1
+            return False
+        state.see(update_id)
+        state.in_flight.add(update_id)
+        return True
+
+    def done(self, bot_id: int, update_id: int):
+        state = self.__state__(bot_id)
+        state.in_flight.discard(update_id)
+        # updates may be done out of order, commit the oldest one in flight
+        offset = min(
+            state.in_flight) if state.in_flight else state.last_update_id + 1
+        if offset > state.offset:
+            state.offset = offset
+            state.done = {_id for _id in state.done if _id >= offset}
+        if update_id >= state.offset:
+            state.done.add(update_id)
+        state.dirty = True
+
+    def snapshot(self, bot_id: int) -> Optional[dict]:
+        # the changes since the last snapshot
+        state = self._states.get(bot_id, None)
+        if state is None or not state.dirty:
+            return None
+        state.dirty = False
+        return {"offset": state.offset, "done": sorted(state.done)}
+
+    def save(self, bot_id: int, mapping: dict) -> bool:
+        if self.storage is None:
+            return False
+        return self.storage.update_fields(self.KEY_FORMAT.format(bot_id),
+                                          mapping, self.expires)
+
+    def snapshots(self, *bot_ids):
+        # snapshots of the given bots or all bots
+        return [(bot_id, mapping)
+                for bot_id, mapping in ((bot_id, self.snapshot(bot_id))
+                                        for bot_id in bot_ids
+                                        or tuple(self._states)) if mapping]
+
+    def save_snapshots(self, snapshots) -> bool:
+        for bot_id, mapping in snapshots:
+            self.save(bot_id, mapping)
+        return True
+
+    def flush(self, *bot_ids) -> bool:
+        return self.save_snapshots(self.snapshots(*bot_ids))
+
+
 class TelegramSession(UserDict):
     __slots__ = ("_storage", "id", "expires")
 
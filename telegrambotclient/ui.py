@@ -14,7 +14,12 @@ class ReplyKeyboard(UserList):
     def add_rows(self, *rows):
         self.data += rows
 
-    def markup(self, **kwargs):
+    def markup(self, frozen: bool = False, **kwargs):
+        if frozen:
+            # a snapshot of rows, later changes on the keyboard do not leak in
+            return ReplyKeyboardMarkup(keyboard=tuple(
+                tuple(row) for row in self.data),
+                                       **kwargs).freeze()
         return ReplyKeyboardMarkup(keyboard=self.data, **kwargs)
 
     def __add__(self, keyboard):
@@ -23,7 +28,10 @@ class ReplyKeyboard(UserList):
 
 
 class InlineKeyboard(ReplyKeyboard):
-    def markup(self):
+    def markup(self, frozen: bool = False):
+        if frozen:
+            return InlineKeyboardMarkup(inline_keyboard=tuple(
+                tuple(row) for row in self.data)).freeze()
         return InlineKeyboardMarkup(inline_keyboard=self.data)
 
     def where(self, callback_data: str):
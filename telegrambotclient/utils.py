@@ -1,12 +1,10 @@
 import pprint
+import shlex
 from functools import wraps
 from io import StringIO
 from typing import Any, List, Tuple, Union
 
-try:
-    import ujson as json
-except ImportError:
-    import json
+from telegrambotclient import codec
 
 _pp = pprint.PrettyPrinter(indent=2, width=128)
 
@@ -54,14 +52,29 @@ def i18n(default_lang_code: str = "en"):
 
 
 def build_callback_data(button_name: str, *value) -> str:
-    data = "{0}|{1}".format(button_name, json.dumps(value))
+    data = "{0}|{1}".format(button_name, codec.dumps(value))
     assert len(data.encode("utf-8")) <= 64, True
     return data
 
 
 def parse_callback_data(callback_data: str):
     button_name, value = tuple(callback_data.split("|", maxsplit=1))
-    return button_name, tuple(json.loads(value))
+    return button_name, tuple(codec.loads(value))
+
+
+def parse_command_args(text: str) -> Tuple[str, ...]:
+    # a double quoted text is one argument, apostrophes and backslashes are kept
+    if '"' not in text:
+        return tuple(text.split())
+    lexer = shlex.shlex(text, posix=True)
+    lexer.whitespace_split = True
+    lexer.quotes = '"'
+    lexer.escape = ""
+    try:
+        return tuple(lexer)
+    except ValueError:
+        # unbalanced quotes
+        return tuple(text.split())
 
 
 def compose_message_entities(text_entities: Union[List, Tuple],
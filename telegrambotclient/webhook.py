@@ -0,0 +1,262 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import threading
+from collections import Counter
+from typing import Optional
+
+from telegrambotclient import codec
+from telegrambotclient.base import (TelegramObject, UpdateField,
+                                    get_update_field)
+
+
+def get_webhook_path(token: str) -> str:
+    # a bot token never shows up in a webhook url
+    return "/{0}".format(
+        hashlib.blake2b(token.encode("utf-8"), digest_size=16).hexdigest())
+
+
+class AdmissionControl:
+    # what to do with an update past the limits
+    REJECT = "reject"  # respond status, telegram delivers it again later
+    DROP = "drop"  # ack and forget it
+    SPILL = "spill"  # ack and keep it in a local file until the load drops
+    __slots__ = ("max_in_flight", "high_water", "policy", "low_priority",
+                 "status", "retry_after", "spill_path", "check_interval",
+                 "in_flight", "counters", "_lock")
+
+    def __init__(self,
+                 max_in_flight: int = 0,
+                 high_water: int = 0,
+                 policy: str = REJECT,
+                 low_priority=(UpdateField.CHOSEN_INLINE_RESULT,
+                               UpdateField.POLL, UpdateField.POLL_ANSWER),
+                 status: int = 503,
+                 retry_after: int = 1,
+                 spill_path: Optional[str] = None,
+                 check_interval: float = 1):
+        # max_in_flight: updates being handed to workers,
+        # high_water: updates queued in workers and being handed to them
+        assert policy != self.SPILL or spill_path, True
+        self.max_in_flight = max_in_flight
+        self.high_water = high_water
+        self.policy = policy
+        # updates of these fields are dropped first past the limits
+        self.low_priority = frozenset(
+            field.value if isinstance(field, UpdateField) else field
+            for field in low_priority)
+        self.status = status
+        self.retry_after = retry_after
+        self.spill_path = spill_path
+        self.check_interval = check_interval
+        self.in_flight = 0
+        # ("rejected"|"dropped"|"spilled", "in_flight"|"high_water") -> count
+        self.counters = Counter()
+        # spills are written by threads, one at a time and never during a replay
+        self._lock = threading.Lock()
+
+    def depth(self, pending: int) -> int:
+        # pending of the scheduler is capped by its max_pending,
+        # updates waiting for a free slot are in flight
+        return pending + self.in_flight
+
+    def check(self, pending: int) -> Optional[str]:
+        # the exceeded limit
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            return "in_flight"
+        if self.high_water and self.depth(pending) >= self.high_water:
+            return "high_water"
+        return None
+
+    def shed(self, update_field: str, reason: str) -> str:
+        action = self.DROP if update_field in self.low_priority else self.policy
+        self.counters[({
+            self.REJECT: "rejected",
+            self.DROP: "dropped",
+            self.SPILL: "spilled"
+        }[action], reason)] += 1
+        return action
+
+    def spill(self, path: str, update: TelegramObject):
+        # a line of [path, update] per update, blocking, call it in an executor
+        line = codec.dumpb((path, update)) + b"\n"
+        with self._lock:
+            with open(self.spill_path, "ab") as spill_file:
+                spill_file.write(line)
+
+    def load_spilled(self):
+        replay_path = "{0}.replay".format(self.spill_path)
+        if not os.path.exists(replay_path):
+            with self._lock:
+                if not os.path.exists(self.spill_path):
+                    return ()
+                os.replace(self.spill_path, replay_path)
+        with open(replay_path, "rb") as replay_file:
+            lines = replay_file.read().splitlines()
+        os.remove(replay_path)
+        return [codec.loads(line) for line in lines if line]
+
+
+class WebhookApp:
+    # an asgi app which receives updates of all bots of a bot client,
+    # it acks an update at once and dispatches it in the background.
+    # run: uvicorn module:app
+    SECRET_HEADER = b"x-telegram-bot-api-secret-token"
+    __slots__ = ("bot_client", "secret_token", "drain_timeout", "admission",
+                 "start_kwargs", "_bots", "_started", "_replay_task")
+
+    def __init__(self,
+                 bot_client,
+                 secret_token: str,
+                 drain_timeout: float = 10,
+                 admission: Optional[AdmissionControl] = None,
+                 **start_kwargs):
+        # start_kwargs are for bot_client.start, e.g. concurrency, key and checkpoint
+        self.bot_client = bot_client
+        self.admission = admission
+        self._replay_task = None
+        # a same secret token for all processes and replicas of the app,
+        # 1-256 characters of A-Z, a-z, 0-9, _ and -
+        assert secret_token and len(secret_token) <= 256 and all(
+            char.isascii() and (char.isalnum() or char in "_-")
+            for char in secret_token), True
+        self.secret_token = secret_token
+        self.drain_timeout = drain_timeout
+        self.start_kwargs = start_kwargs
+        self._bots = {}
+        self._started = None
+
+    def set_webhooks(self, url: str, **kwargs):
+        # url is the base url where the app is served
+        for token, bot in self.bot_client.bots.items():
+            bot.set_webhook(url="{0}{1}".format(url.rstrip("/"),
+                                                get_webhook_path(token)),
+                            secret_token=self.secret_token,
+                            **kwargs)
+
+    def get_bot(self, path: str):
+        bot = self._bots.get(path, None)
+        if bot is None and len(self._bots) != len(self.bot_client.bots):
+            # bots are created after the app
+            self._bots = {
+                get_webhook_path(token): bot
+                for token, bot in self.bot_client.bots.items()
+            }
+            bot = self._bots.get(path, None)
+        return bot
+
+    async def startup(self):
+        if self._started is None:
+            self._started = asyncio.ensure_future(
+                self.bot_client.start(polling=False, **self.start_kwargs))
+            if self.admission and self.admission.policy == AdmissionControl.SPILL:
+                self._replay_task = asyncio.ensure_future(self.__replay__())
+        await self._started
+
+    async def shutdown(self):
+        if self._replay_task is not None:
+            self._replay_task.cancel()
+            self._replay_task = None
+        if self._started is not None:
+            await self.bot_client.stop(self.drain_timeout)
+            self._started = None
+
+    async def __replay__(self):
+        # hand spilled updates to workers when they are below half of the high water
+        loop = asyncio.get_running_loop()
+        admission = self.admission
+        while True:
+            await asyncio.sleep(admission.check_interval)
+            if admission.high_water and admission.depth(
+                    self.bot_client.scheduler.pending) >= admission.high_water // 2:
+                continue
+            for path, update in await loop.run_in_executor(
+                    None, admission.load_spilled):
+                bot = self.get_bot(path)
+                if bot is not None:
+                    await self.bot_client.submit(bot,
+                                                 TelegramObject(**update))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            return await self.__serve_update__(scope, receive, send)
+        if scope["type"] == "lifespan":
+            return await self.__serve_lifespan__(receive, send)
+
+    async def __serve_lifespan__(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as error:
+                    await send({
+                        "type": "lifespan.startup.failed",
+                        "message": str(error)
+                    })
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @classmethod
+    async def __respond__(cls, send, status: int, headers=()):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-length", b"0"), *headers]
+        })
+        await send({"type": "http.response.body", "body": b""})
+
+    async def __serve_update__(self, scope, receive, send):
+        if scope["method"] != "POST":
+            return await self.__respond__(send, 405)
+        bot = self.get_bot(scope["path"])
+        if bot is None:
+            return await self.__respond__(send, 404)
+        secret_token = b""
+        for name, value in scope["headers"]:
+            if name == self.SECRET_HEADER:
+                secret_token = value
+                break
+        if not hmac.compare_digest(secret_token,
+                                   self.secret_token.encode("utf-8")):
+            return await self.__respond__(send, 403)
+        body, more_body = [], True
+        while more_body:
+            message = await receive()
+            body.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        try:
+            # parse bytes once by the codec
+            update = TelegramObject(**codec.loads(b"".join(body)))
+        except Exception:
+            return await self.__respond__(send, 400)
+        if self._started is None:
+            await self.startup()
+        admission = self.admission
+        if admission is None:
+            # ack at once, telegram never waits for handlers
+            await self.__respond__(send, 200)
+            return await self.bot_client.submit(bot, update)
+        reason = admission.check(self.bot_client.scheduler.pending)
+        if reason:
+            action = admission.shed(get_update_field(update), reason)
+            if action == admission.REJECT:
+                return await self.__respond__(
+                    send, admission.status,
+                    ((b"retry-after", str(admission.retry_after).encode()), ))
+            if action == admission.SPILL:
+                # ack after the update is on the disk, off the event loop
+                await asyncio.get_running_loop().run_in_executor(
+                    None, admission.spill, scope["path"], update)
+            return await self.__respond__(send, 200)
+        admission.in_flight += 1
+        try:
+            await self.__respond__(send, 200)
+            await self.bot_client.submit(bot, update)
+        finally:
+            admission.in_flight -= 1